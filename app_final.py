@@ -1,29 +1,33 @@
 # === Imports ===
-from pyexpat import features  # Unused XML parser import
 import streamlit as st  # Streamlit for web UI
 import pandas as pd  # Data handling
-import joblib  # Load serialized models
-import base64  # Encode images
 import json  # Read JSON files
 from pathlib import Path  # File paths
-import xgboost as xgb  # XGBoost model
-from sklearn.preprocessing import StandardScaler  # Scaling for similarity
-from scipy.spatial.distance import cdist  # Distance for player similarity
-
-# === Category display mapping ===
-label_mapping = {
-    "other": {
-        "scorer_before_grouped_category": "20+",
-        "clean_sheets_before_grouped": "15+"
-    }
-}
-
-# Reverse mapping for labels
-reverse_mapping = {
-    "20+": "15-20",
-    "15+": "10-15"
-}
+from reference_refresh import ReferenceState, data_version, merge_vocabulary, update_files, update_vocabulary  # Appended transfer windows
+from features import FeatureBuilder, REVERSE_MAPPING, display_labels  # Model feature frame
+from sweep import SWEEP_INPUTS, sweep_values, run_sweep  # What-if sensitivity
+from candidate_search import load_candidate_search  # Target club candidate ranking
+from prediction_cache import PredictionCache, prediction_key  # Repeated queries
+from speculative import SpeculationCancelled, SpeculativePredictor  # Background prediction while editing
+from tree_engine import compile_model  # Fast single-row inference
+from gam_table import compile_gam  # Fast GAM calibration
+from explain import contributions, waterfall_png  # Per-prediction SHAP
+from evaluation import GROUPINGS, load_evaluation  # Backtest accuracy
+import os  # Environment settings
+import functools  # Fragment wrappers
+from timing import (  # Stage latency instrumentation
+    LapTimer, begin_run, current_run, enable_timing_log, log_run, registry, stage, start_metrics_server,
+)
 
+# Collect stage timings for this rerun
+begin_run()
+laps = LapTimer()
+from build_lookups import PREDICTIONS_PATH, load_lookups  # Dropdown lookups
+from pipeline import (  # Models and prediction chain
+    MODEL_PATH, GAM_MODEL_PATH, file_fingerprint,
+    load_model, load_gam_model, model_feature_names,
+    PLAYING_TIME_BANDS, predict_playing_time, playing_time_band,
+)
 
 # Sort grouped labels based on numeric values
 def sort_grouped_labels(labels):
@@ -124,17 +128,14 @@ st.markdown(
 
 # === BACKGROUND FUNCTION WITH OVERLAY ===
 
-# Define background and logo paths
-stadium_background = "stadium.jpg"
-logo_fc = "1-fc-koln-logo-png_seeklogo-266469.png"
-logo_uni = "Uni_blau2.png"
+# Define background and logo URLs, served from static/ (built by build_assets.py)
+stadium_background = "./app/static/stadium.jpg"
+logo_fc = "./app/static/fc_logo.png"
+logo_uni = "./app/static/uni_logo.png"
 
 
 # Set background image with dark overlay
-def set_bg_image_with_overlay(image_path):
-    with open(image_path, "rb") as img_file:
-        img_base64 = base64.b64encode(img_file.read()).decode()
-
+def set_bg_image_with_overlay(image_url):
     st.markdown(
     f"""
     <style>
@@ -145,7 +146,7 @@ def set_bg_image_with_overlay(image_path):
 
     .stApp {{
         background: linear-gradient(rgba(0,0,0,0.7), rgba(0,0,0,0.7)),
-                    url("data:image/png;base64,{img_base64}");
+                    url("{image_url}");
         background-size: cover;
         background-position: center;
         background-attachment: fixed;
@@ -181,12 +182,65 @@ def set_bg_image_with_overlay(image_path):
 
 # Apply background
 set_bg_image_with_overlay(stadium_background)
+laps.lap("page_styles")
+
+# Reference dataset and similarity index, shared by all sessions and loaded on the first
+# prediction: memory-mapped from the snapshot file when another process already published
+# it, else built and published. Transfers appended with reference_refresh.py are applied
+# in the background; each prediction reads one consistent snapshot.
+@st.cache_resource
+def load_reference_state():
+    return ReferenceState()
 
-# Load player reference dataset
+def current_reference_snapshot():
+    with stage("load_reference"):
+        reference_state = load_reference_state()
+    reference_state.poll()
+    return reference_state.snapshot
+
+
+# Dropdown additions from appended transfer windows, read from the update files alone
 @st.cache_data
-def load_player_reference_data():
-    return pd.read_csv("df.csv")
-reference_df = load_player_reference_data()
+def load_update_vocabulary(paths):
+    return update_vocabulary(paths)
+
+
+# Prediction cache shared by all sessions
+@st.cache_resource
+def load_prediction_cache():
+    return PredictionCache()
+prediction_cache = load_prediction_cache()
+laps.lap("prediction_cache")
+
+
+# Optional Prometheus endpoint (GET /metrics) and structured timing logs
+@st.cache_resource
+def start_timing_exports():
+    if os.environ.get("DASHBOARD_TIMING_LOG"):
+        enable_timing_log()
+    port = os.environ.get("DASHBOARD_METRICS_PORT")
+    return start_metrics_server(int(port)) if port else None
+start_timing_exports()
+
+
+# Panels with widgets are fragments: their widgets rerun only the panel, not this script.
+# A panel rerunning on its own records its stages as a run of its own; during a full
+# rerun it is part of the script's laps.
+script_running = True
+
+def timed_fragment(name):
+    def decorate(render):
+        @st.fragment
+        @functools.wraps(render)
+        def run_fragment():
+            if script_running:
+                return render()
+            begin_run()
+            with stage(name):
+                render()
+            log_run(name, current_run())
+        return run_fragment
+    return decorate
 
 
 # === HELP ICON ===
@@ -208,16 +262,18 @@ st.markdown("""
 .tooltip {
     display: none;
     position: absolute;
-    top: 20px;
+    top: 22px;
     left: 0;
+    width: 360px;
     background-color: #333;
     color: #fff;
-    padding: 0.7rem;
+    padding: 0.8rem;
     border-radius: 8px;
     font-size: 0.85rem;
-    max-width: 240px;
     z-index: 1000;
     box-shadow: 0 4px 10px rgba(0,0,0,0.3);
+    white-space: normal;
+    line-height: 1.4;
 }
 </style>
 """, unsafe_allow_html=True)
@@ -226,10 +282,6 @@ st.markdown("""
 
 # === HEADER SECTION WITH LOGOS AND TITLE ===
 
-# Encode logos for header
-fc_logo = base64.b64encode(open(logo_fc, "rb").read()).decode()
-uni_logo = base64.b64encode(open(logo_uni, "rb").read()).decode()
-
 # Render header with logos
 st.markdown(f"""
 <style>
@@ -268,16 +320,19 @@ st.markdown(f"""
 </style>
 
 <div class="responsive-header">
-    <img src="data:image/png;base64,{fc_logo}" alt="FC Köln Logo">
+    <img src="{logo_fc}" alt="FC Köln Logo">
     <div class="title">
         1. FC Köln Transfer Success Predictor<br>
         <span style="font-weight: 400; font-size: 0.9rem;">Developed with University of Cologne</span>
     </div>
-    <img src="data:image/png;base64,{uni_logo}" alt="Uni Logo">
+    <img src="{logo_uni}" alt="Uni Logo">
 </div>
 """, unsafe_allow_html=True)
 
 
+laps.lap("header")
+
+
 # === CARD STYLE HELPER ===
 
 # Start custom card block
@@ -297,19 +352,73 @@ def card_end():
 
 
 # === Load Model and Mappings ===
-model = xgb.XGBRegressor()
-model.load_model("model2.json")
+
+# Models are loaded on the first prediction, once per process, and shared across sessions,
+# so the first page render does not wait for xgboost and pygam. The file fingerprint in
+# the cache key triggers a reload when a model file changes.
+# DASHBOARD_LAZY_START=0 loads the models and the similarity index at startup instead.
+@st.cache_resource(max_entries=1)
+def load_xgb_model(path, fingerprint):
+    return load_model(path)
 
 
 # Load GAM model
-gam_model = joblib.load("gam_model.pkl")
+@st.cache_resource(max_entries=1)
+def load_gam(path, fingerprint):
+    return load_gam_model(path)
 
-# Load category mappings
+# Load dropdown lookups and category mappings (built by build_lookups.py)
 @st.cache_data
-def load_mapping():
-    with open("category_mappings.json") as f:
-        return json.load(f)
-category_mappings = load_mapping()
+def load_lookup_artifact():
+    return load_lookups()
+lookups = merge_vocabulary(load_lookup_artifact(), load_update_vocabulary(tuple(update_files())))
+category_mappings = lookups["category_mappings"]
+
+
+# Feature names of the model file, read without loading the model
+@st.cache_data(max_entries=1)
+def load_model_feature_names(path, fingerprint):
+    return tuple(model_feature_names(path))
+
+
+# Feature builder with categorical dtypes prebuilt once per model
+@st.cache_resource(max_entries=1)
+def load_feature_builder(feature_names):
+    return FeatureBuilder(feature_names, category_mappings)
+feature_builder = load_feature_builder(load_model_feature_names(MODEL_PATH, file_fingerprint(MODEL_PATH)))
+
+
+# Compiled trees for single-row predictions, used only when they match model.predict on a probe set;
+# DASHBOARD_FAST_INFERENCE=0 keeps the exact XGBoost and pygam predictors
+@st.cache_resource(max_entries=1)
+def load_fast_predictor(path, fingerprint):
+    model = load_xgb_model(path, fingerprint)
+    if os.environ.get("DASHBOARD_FAST_INFERENCE", "1") == "0":
+        return model
+    return compile_model(model, feature_builder.dtypes) or model
+
+
+# GAM calibration as an interpolation table validated against pygam, under the same switch
+@st.cache_resource(max_entries=1)
+def load_fast_calibrator(path, fingerprint):
+    gam_model = load_gam(path, fingerprint)
+    if os.environ.get("DASHBOARD_FAST_INFERENCE", "1") == "0":
+        return gam_model
+    return compile_gam(gam_model) or gam_model
+
+
+# XGBoost model, single-row predictor and GAM calibrator
+def prediction_models():
+    model_fingerprint, gam_fingerprint = file_fingerprint(MODEL_PATH), file_fingerprint(GAM_MODEL_PATH)
+    with stage("load_models"):
+        return (load_xgb_model(MODEL_PATH, model_fingerprint),
+                load_fast_predictor(MODEL_PATH, model_fingerprint),
+                load_fast_calibrator(GAM_MODEL_PATH, gam_fingerprint))
+
+
+if os.environ.get("DASHBOARD_LAZY_START", "1") == "0":
+    prediction_models()
+    current_reference_snapshot()
 
 
 # Assign valid categories from mappings
@@ -322,60 +431,124 @@ valid_clean_sheets = category_mappings.get("clean_sheets_before_grouped", ["0-2"
 valid_scorer_groups = category_mappings.get("scorer_before_grouped_category", ["defender/goalkeeper", "0-3", "3-6", "6-10", "10-15", "15-20", "other"])
 
 # Mapping positionGroup → mainPosition
-position_group_to_main = pd.read_csv("xgboost_predictions_test.csv").groupby("positionGroup")["mainPosition"].unique().apply(list).to_dict()
+position_group_to_main = lookups["position_group_to_main"]
 
 
 # League level per area
-area_to_levels = {
-    'Austria': [1, 2], 'Belgium': [1, 2], 'Bosnia-Herzegovina': [1], 'Bulgaria': [1], 'Canada': [1],
-    'Croatia': [1, 2], 'Czech Republic': [1], 'Denmark': [1, 2], 'England': [1, 2, 3, 4], 'Estonia': [1],
-    'Finland': [1, 2], 'France': [1, 2, 3], 'Georgia': [1], 'Germany': [1, 2, 3, 4], 'Greece': [1],
-    'Hungary': [1], 'Ireland': [1], 'Israel': [1], 'Italy': [1, 2], 'Japan': [1], 'Korea, South': [1],
-    'Latvia': [1], 'Lithuania': [1], 'Luxembourg': [1], 'Malta': [1], 'Moldova': [1], 'Montenegro': [1],
-    'Netherlands': [1, 2], 'Northern Ireland': [1], 'Norway': [1, 2], 'Poland': [1], 'Portugal': [1, 2],
-    'Romania': [1], 'Russia': [1], 'Saudi Arabia': [1], 'Scotland': [1], 'Serbia': [1], 'Slovakia': [1],
-    'Slovenia': [1], 'Spain': [1, 2], 'Sweden': [1, 2], 'Switzerland': [1, 2], 'Türkiye': [1],
-    'Ukraine': [1], 'United States': [1, 2, 3], 'Wales': [1]
-}
+area_to_levels = lookups["area_to_levels"]
+laps.lap("models_and_lookups")
+
+
+# === Prepare model input ===
+
+# Raw transfer last stored by the input cards
+def committed_input():
+    return st.session_state["transfer_input"]
+
+
+# Typed one-row model matrix
+def model_input(data):
+    with stage("feature_frame"):
+        return feature_builder.build(pd.DataFrame([data]))
+
+
+# Variables for similar player transfer
+def similarity_query(data):
+    return {
+        #"height": data["height"],
+        "mainPosition": data["mainPosition"],
+        "positionGroup": data["positionGroup"],
+        #"foot": data["foot"],
+        "transferAge": data["transferAge"],
+        "marketvalue_closest": data["marketvalue_closest"],
+        "toTeam_marketValue": data["toTeam_marketValue"],
+        "fromTeam_marketValue": data["fromTeam_marketValue"],
+        "percentage_played_before": data["percentage_played_before"],
+        "scorer_before_grouped_category": data["scorer_before_grouped_category"],
+        "clean_sheets_before": data["clean_sheets_before_grouped"],
+        'from_competition_competition_area': data["from_competition_competition_area"],
+        'to_competition_competition_area': data["to_competition_competition_area"],
+        'from_competition_competition_level': data["from_competition_competition_level"],
+        'to_competition_competition_level': data["to_competition_competition_level"],
+        'team_market_value_relation': data["toTeam_marketValue"] / data["fromTeam_marketValue"] if data["fromTeam_marketValue"] > 0 else 0
+    }
+
+
+# Cache key of a transfer: the model matrix plus the versions of the models and the reference data
+def prediction_cache_key(input_df, reference_version):
+    model_versions = [file_fingerprint(path) for path in (MODEL_PATH, GAM_MODEL_PATH)] + [reference_version]
+    return prediction_key(input_df, model_versions)
+
+
+# Prediction, similar transfers and SHAP waterfall of one transfer. Also runs in the
+# speculative workers, so no st.* calls; checkpoint() between the stages lets a
+# speculative run stop once the inputs have changed.
+def compute_prediction(data, input_df, models, reference_snapshot, checkpoint=lambda: None):
+    model, predictor, calibrator = models
+
+    # Original model prediction, calibrated by the GAM metamodel
+    xgb_pred, final_pred = predict_playing_time(predictor, calibrator, input_df)
+    checkpoint()
+
+    input_query = similarity_query(data)
+
+    with stage("similar_players"):
+        similar_players = reference_snapshot.similarity_index.query(input_query)
+    checkpoint()
+
+    # SHAP contributions of this transfer and their waterfall chart, cached with the prediction
+    contribs = contributions(model, input_df).iloc[0]
+    checkpoint()
+    feature_labels = {col: f"{col} = {value:.4g}" if pd.api.types.is_float(value) else f"{col} = {value}"
+                      for col, value in input_df.iloc[0].items()}
+    with stage("waterfall_chart"):
+        chart = waterfall_png(contribs, feature_labels)
+    return xgb_pred, final_pred, similar_players, contribs, chart
+
+
+# Optional speculative mode (DASHBOARD_SPECULATIVE=1): edited inputs are predicted in a
+# background pool shared by all sessions, so Predict usually finds the result in the cache
+@st.cache_resource
+def load_speculator():
+    if os.environ.get("DASHBOARD_SPECULATIVE", "0") != "1":
+        return None
+    return SpeculativePredictor(prediction_cache)
+speculator = load_speculator()
+
+
+# Background work of a speculation: the models and the reference snapshot are loaded in the
+# worker, so an edit never waits for them. A snapshot that has not caught up with the files
+# the key was made for drops the result; Predict then computes it.
+def speculative_prediction(data, input_df, reference_version, checkpoint):
+    models = prediction_models()
+    reference_snapshot = current_reference_snapshot()
+    if reference_snapshot.version != reference_version:
+        raise SpeculationCancelled()
+    checkpoint()
+    return compute_prediction(data, input_df, models, reference_snapshot, checkpoint)
+
+
+# Start a background prediction for the inputs and cancel this session's previous one.
+# The key is made from the reference version on disk, without loading the snapshot.
+def speculate(data):
+    input_df = model_input(data)
+    reference_version = data_version()
+    cache_key = prediction_cache_key(input_df, reference_version)
+
+    previous = st.session_state.get("speculation")
+    if previous is not None:
+        if previous.key == cache_key and not previous.cancelled.is_set():
+            return
+        previous.cancel()
+    st.session_state["speculation"] = speculator.submit(
+        cache_key, functools.partial(speculative_prediction, data, input_df, reference_version))
 
 
 # === Inputs ===
 
-# Function to create label + tooltip
+# Label with a hover tooltip; the tooltip itself is styled once in the HELP ICON block
 def help_input(label, tooltip_text):
     st.markdown(f"""
-    <style>
-    .help-icon {{
-        display: inline-block;
-        position: relative;
-        cursor: pointer;
-        margin-left: 8px;
-        color: #FFD700;
-        font-weight: bold;
-    }}
-
-    .tooltip {{
-        display: none;
-        position: absolute;
-        top: 22px;
-        left: 0;
-        width: 360px;
-        background-color: #333;
-        color: #fff;
-        padding: 0.8rem;
-        border-radius: 8px;
-        font-size: 0.85rem;
-        z-index: 1000;
-        box-shadow: 0 4px 10px rgba(0,0,0,0.3);
-        white-space: normal;
-        line-height: 1.4;
-    }}
-
-    .help-icon:hover .tooltip {{
-        display: block;
-    }}
-    </style>
-
     <div style='margin-bottom: -15px'>
         <label style='font-weight:600;'>{label}</label>
         <span class="help-icon">❓
@@ -385,294 +558,404 @@ def help_input(label, tooltip_text):
     """, unsafe_allow_html=True)
 
 
-# Layout: two input columns
-col1, col2 = st.columns(2)
-
-# Input fields in left column
-with col1:
-    card_start("Player Profile")
-
-    # Slider and dropdowns: height, age, position group, main position, foot, market value
-    help_input("Height (cm)", "Enter the player's height in centimeters. Taller players may perform better in aerial duels.")
-    height = st.slider("", 150, 220, 180, key="height")
-
-    help_input("Transfer Age", "Enter the player's age at the time of transfer. Important for assessing player development and experience.")
-    transfer_age = st.slider("", 16, 40, 25, key="transfer_age")
-
-    help_input("Position Group", "Select the player's position group. Important for tactical fit and team balance.")  
-    filtered_position_groups = [p for p in valid_position_groups if p.lower() != "other"]
-    posgroup_display = [position_group_display_map.get(p, p.title()) for p in filtered_position_groups]
-    selected_posgroup_display = st.selectbox("", posgroup_display, key="position_group")
-    position_group = position_group_reverse_map.get(selected_posgroup_display, selected_posgroup_display)
-
-    help_input("Main Position", "Select the player's main position. Important for tactical fit and team balance.")
-    valid_main_pos = [p for p in position_group_to_main.get(position_group, []) if p.lower() != "other"]
-    main_pos_display = [main_position_display_map.get(p, p) for p in valid_main_pos]
-    selected_main_pos_display = st.selectbox("", main_pos_display, key="main_position")
-    main_position = main_position_reverse_map.get(selected_main_pos_display, selected_main_pos_display)
+# Input cards rerun on their own: a widget change re-executes and re-sends only the cards,
+# so dependent dropdowns stay live while the page styles and the result panel are left
+# alone. Every run stores the raw transfer in the session for Predict to commit.
+@timed_fragment("input_fragment")
+def input_cards():
+    # Layout: two input columns
+    col1, col2 = st.columns(2)
 
-    help_input("Preferred Foot", "Select the player's preferred foot. Important for assessing shooting and passing capabilities.")
-    filtered_feet = [f for f in valid_feet if f.lower() != "unknown"]
-    foot_display = [foot_display_map.get(f, f.title()) for f in filtered_feet]
-    selected_foot_display = st.selectbox("", foot_display, key="foot")
-    foot = foot_reverse_map.get(selected_foot_display, selected_foot_display)
+    # Input fields in left column
+    with col1:
+        card_start("Player Profile")
 
-    help_input("Player Market Value (€M)", "Estimated market value of the player in millions of euros. Important for assessing transfer budget and player quality.")
-    market_value = st.number_input("", 0.0, 200.0, 15.0, key="market_value")
+        # Slider and dropdowns: height, age, position group, main position, foot, market value
+        help_input("Height (cm)", "Enter the player's height in centimeters. Taller players may perform better in aerial duels.")
+        height = st.slider("", 150, 220, 180, key="height")
 
-    card_end()
+        help_input("Transfer Age", "Enter the player's age at the time of transfer. Important for assessing player development and experience.")
+        transfer_age = st.slider("", 16, 40, 25, key="transfer_age")
 
+        help_input("Position Group", "Select the player's position group. Important for tactical fit and team balance.")  
+        filtered_position_groups = [p for p in valid_position_groups if p.lower() != "other"]
+        posgroup_display = [position_group_display_map.get(p, p.title()) for p in filtered_position_groups]
+        selected_posgroup_display = st.selectbox("", posgroup_display, key="position_group")
+        position_group = position_group_reverse_map.get(selected_posgroup_display, selected_posgroup_display)
 
-    card_start("Performance Details")
-
-    # Playing %, scorer group, clean sheets
-    help_input("Playing % Before", "Percentage of minutes played in the last season. Important for assessing player fitness and reliability.")
-    percentage_played_before = st.slider("", 0.0, 100.0, 50.0, key="percentage_played_before")
-
-    if position_group.lower() in ['defender', 'goalkeeper']:
-        scorer_raw = "defender/goalkeeper"
-        st.markdown("**Scorer (Goals + Assists):** Automatically ignored for defenders and goalkeepers")
-    else:
-        help_input("Scorer Value (Goals + Assists)", "Total goals and assists scored by the player in the last season. Important for forwards and midfielders.")
-        # without "defender/goalkeeper" 
-        scorer_options = [g for g in valid_scorer_groups if g != "defender/goalkeeper"]
-        scorer_mapped = [label_mapping["other"]["scorer_before_grouped_category"] if g == "other" else g for g in scorer_options]
-        scorer_sorted = sort_grouped_labels(scorer_mapped)
-        selected_scorer_display = st.selectbox("", scorer_sorted, key="scorer")
-        scorer_raw = reverse_mapping.get(selected_scorer_display, selected_scorer_display)
-
-    help_input("Clean Sheets", "Number of clean sheets kept by the player in the last season. Important for goalkeepers and defenders.")
-    cs_mapped = [label_mapping["other"]["clean_sheets_before_grouped"] if val == "other" else val for val in valid_clean_sheets]
-    cs_sorted = sort_grouped_labels(cs_mapped)
-    selected_cs_display = st.selectbox("", cs_sorted, key="clean_sheets")
-    clean_sheets_before = reverse_mapping.get(selected_cs_display, selected_cs_display)
-
-
-
-    card_end()
-
-with col2:
-    card_start("Transfer Details")
-
-    # From Team Market Value in €M 
-    help_input("From Team Market Value (€M)", "Market value of the team the player is transferring from. Important for assessing the player's previous club's financial strength and quality.")
-    from_team_market_value_million = st.number_input("", 0.0, 1400.0, 61.7, key="from_team_market_value")
-
-    # To Team Market Value in €M 
-    help_input("To Team Market Value (€M)", "Market value of the team the player is transferring to. Important for assessing the player's new club's financial strength and quality.")
-    to_team_market_value_million = st.number_input("", 0.0, 1400.0, 61.7, key="to_team_market_value")
-
-    # recalculating in Euro
-    from_team_market_value = from_team_market_value_million * 1_000_000
-    to_team_market_value = to_team_market_value_million * 1_000_000
-
-    help_input("From Area", "Select the country of the team the player is transferring from. Important for assessing league strength and player adaptation.")
-    from_area = st.selectbox("", valid_areas, index=valid_areas.index("Germany") if "Germany" in valid_areas else 0, key="from_area")
-
-    help_input("From Level", "Select the competition level of the team the player is transferring from. Important for assessing league strength and player adaptation.")
-    from_level = st.selectbox("", area_to_levels.get(from_area, [1, 2, 3, 4]),
-                              index=area_to_levels.get(from_area, [1, 2, 3, 4]).index(1) if 1 in area_to_levels.get(from_area, [1, 2, 3, 4]) else 0,
-                              key="from_level")
-
-    help_input("To Area", "Select the geographical area of the team the player is transferring to. Important for assessing league strength and player adaptation.")
-    to_area = st.selectbox("", valid_to_areas, index=valid_to_areas.index("Germany") if "Germany" in valid_to_areas else 0, key="to_area")
+        help_input("Main Position", "Select the player's main position. Important for tactical fit and team balance.")
+        valid_main_pos = [p for p in position_group_to_main.get(position_group, []) if p.lower() != "other"]
+        main_pos_display = [main_position_display_map.get(p, p) for p in valid_main_pos]
+        selected_main_pos_display = st.selectbox("", main_pos_display, key="main_position")
+        main_position = main_position_reverse_map.get(selected_main_pos_display, selected_main_pos_display)
+
+        help_input("Preferred Foot", "Select the player's preferred foot. Important for assessing shooting and passing capabilities.")
+        filtered_feet = [f for f in valid_feet if f.lower() != "unknown"]
+        foot_display = [foot_display_map.get(f, f.title()) for f in filtered_feet]
+        selected_foot_display = st.selectbox("", foot_display, key="foot")
+        foot = foot_reverse_map.get(selected_foot_display, selected_foot_display)
+
+        help_input("Player Market Value (€M)", "Estimated market value of the player in millions of euros. Important for assessing transfer budget and player quality.")
+        market_value = st.number_input("", 0.0, 200.0, 15.0, key="market_value")
+
+        card_end()
+
+
+        card_start("Performance Details")
+
+        # Playing %, scorer group, clean sheets
+        help_input("Playing % Before", "Percentage of minutes played in the last season. Important for assessing player fitness and reliability.")
+        percentage_played_before = st.slider("", 0.0, 100.0, 50.0, key="percentage_played_before")
+
+        if position_group.lower() in ['defender', 'goalkeeper']:
+            scorer_raw = "defender/goalkeeper"
+            st.markdown("**Scorer (Goals + Assists):** Automatically ignored for defenders and goalkeepers")
+        else:
+            help_input("Scorer Value (Goals + Assists)", "Total goals and assists scored by the player in the last season. Important for forwards and midfielders.")
+            # without "defender/goalkeeper" 
+            scorer_options = [g for g in valid_scorer_groups if g != "defender/goalkeeper"]
+            scorer_mapped = display_labels("scorer_before_grouped_category", scorer_options)
+            scorer_sorted = sort_grouped_labels(scorer_mapped)
+            selected_scorer_display = st.selectbox("", scorer_sorted, key="scorer")
+            scorer_raw = REVERSE_MAPPING.get(selected_scorer_display, selected_scorer_display)
+
+        help_input("Clean Sheets", "Number of clean sheets kept by the player in the last season. Important for goalkeepers and defenders.")
+        cs_mapped = display_labels("clean_sheets_before_grouped", valid_clean_sheets)
+        cs_sorted = sort_grouped_labels(cs_mapped)
+        selected_cs_display = st.selectbox("", cs_sorted, key="clean_sheets")
+        clean_sheets_before = REVERSE_MAPPING.get(selected_cs_display, selected_cs_display)
+
+
+
+        card_end()
+
+    with col2:
+        card_start("Transfer Details")
+
+        # From Team Market Value in €M 
+        help_input("From Team Market Value (€M)", "Market value of the team the player is transferring from. Important for assessing the player's previous club's financial strength and quality.")
+        from_team_market_value_million = st.number_input("", 0.0, 1400.0, 61.7, key="from_team_market_value")
+
+        # To Team Market Value in €M 
+        help_input("To Team Market Value (€M)", "Market value of the team the player is transferring to. Important for assessing the player's new club's financial strength and quality.")
+        to_team_market_value_million = st.number_input("", 0.0, 1400.0, 61.7, key="to_team_market_value")
+
+        # recalculating in Euro
+        from_team_market_value = from_team_market_value_million * 1_000_000
+        to_team_market_value = to_team_market_value_million * 1_000_000
+
+        help_input("From Area", "Select the country of the team the player is transferring from. Important for assessing league strength and player adaptation.")
+        from_area = st.selectbox("", valid_areas, index=valid_areas.index("Germany") if "Germany" in valid_areas else 0, key="from_area")
+
+        help_input("From Level", "Select the competition level of the team the player is transferring from. Important for assessing league strength and player adaptation.")
+        from_level = st.selectbox("", area_to_levels.get(from_area, [1, 2, 3, 4]),
+                                  index=area_to_levels.get(from_area, [1, 2, 3, 4]).index(1) if 1 in area_to_levels.get(from_area, [1, 2, 3, 4]) else 0,
+                                  key="from_level")
+
+        help_input("To Area", "Select the geographical area of the team the player is transferring to. Important for assessing league strength and player adaptation.")
+        to_area = st.selectbox("", valid_to_areas, index=valid_to_areas.index("Germany") if "Germany" in valid_to_areas else 0, key="to_area")
+
+        help_input("To Level", "Select the competition level of the team the player is transferring to. Important for assessing league strength and player adaptation.")
+        to_level = st.selectbox("", area_to_levels.get(to_area, [1, 2, 3, 4]),
+                                index=area_to_levels.get(to_area, [1, 2, 3, 4]).index(1) if 1 in area_to_levels.get(to_area, [1, 2, 3, 4]) else 0,
+                                key="to_level")
+
+        card_end()
+
+        # Additional checkboxes (loan, joker)
+        with st.expander("Further Transfer Details"):
+            help_input("Loan Transfer", "Check if the transfer is a loan. Important for assessing player commitment and future prospects.")
+            isLoan = st.checkbox("Loan Transfer", key="is_loan")
+
+            help_input("Was Loan Before", "Check if the player was previously on loan. Important for understanding the player's transfer history.")
+            wasLoan = st.checkbox("Was Loan Before", key="was_loan")
+
+            help_input("Was Joker Substitute", "Check if the player was used as a joker substitute. Important for assessing tactical versatility.")
+            was_joker = st.checkbox("Was Joker Substitute", key="was_joker")
+
+    # Raw transfer in the model's column layout; derived features are added by the feature builder
+    st.session_state["transfer_input"] = {
+        'height': height,
+        'transferAge': transfer_age,
+        'isLoan': int(isLoan),
+        'wasLoan': int(wasLoan),
+        'was_joker': int(was_joker),
+        'percentage_played_before': percentage_played_before,
+        'scorer_before_grouped_category': scorer_raw,
+        'clean_sheets_before_grouped': clean_sheets_before,
+        'fromTeam_marketValue': from_team_market_value,
+        'toTeam_marketValue': to_team_market_value,
+        'marketvalue_closest': market_value,
+        'from_competition_competition_level': from_level,
+        'to_competition_competition_level': to_level,
+        'foot': foot,
+        'mainPosition': main_position,
+        'positionGroup': position_group,
+        'from_competition_competition_area': from_area,
+        'to_competition_competition_area': to_area,
+    }
 
-    help_input("To Level", "Select the competition level of the team the player is transferring to. Important for assessing league strength and player adaptation.")
-    to_level = st.selectbox("", area_to_levels.get(to_area, [1, 2, 3, 4]),
-                            index=area_to_levels.get(to_area, [1, 2, 3, 4]).index(1) if 1 in area_to_levels.get(to_area, [1, 2, 3, 4]) else 0,
-                            key="to_level")
+    # Edits only: the first render does not wait for the models
+    if speculator is not None and not script_running:
+        speculate(st.session_state["transfer_input"])
 
-    card_end()
+    # The result panel does not rerun with the cards: the first edit after a prediction reruns
+    # the whole page, which clears the outdated result
+    predicted_input = st.session_state.get("predicted_input")
+    if predicted_input is not None and predicted_input != st.session_state["transfer_input"]:
+        st.session_state["predicted_input"] = None
+        st.rerun()
 
-    # Additional checkboxes (loan, joker)
-    with st.expander("Further Transfer Details"):
-        help_input("Loan Transfer", "Check if the transfer is a loan. Important for assessing player commitment and future prospects.")
-        isLoan = st.checkbox("Loan Transfer", key="is_loan")
-
-        help_input("Was Loan Before", "Check if the player was previously on loan. Important for understanding the player's transfer history.")
-        wasLoan = st.checkbox("Was Loan Before", key="was_loan")
-
-        help_input("Was Joker Substitute", "Check if the player was used as a joker substitute. Important for assessing tactical versatility.")
-        was_joker = st.checkbox("Was Joker Substitute", key="was_joker")
-
-
-# === Foreign Transfer Logic ===
-# Detect if transfer is international
-foreign_transfer = int((from_area != to_area))
-
-# === Prepare input dictionary for model ===
-
-data = {col: 0 for col in model.feature_names_in_}
-data.update({
-    'height': height,
-    'transferAge': transfer_age,
-    'isLoan': int(isLoan),
-    'wasLoan': int(wasLoan),
-    'was_joker': int(was_joker),
-    'foreign_transfer': foreign_transfer,
-    'percentage_played_before': percentage_played_before,
-    'scorer_before_grouped_category': scorer_raw,
-    'clean_sheets_before_grouped': clean_sheets_before,
-    'fromTeam_marketValue': from_team_market_value,
-    'toTeam_marketValue': to_team_market_value,
-    'marketvalue_closest': market_value,
-    'from_competition_competition_level': from_level,
-    'to_competition_competition_level': to_level,
-    'foot': foot,
-    'mainPosition': main_position,
-    'positionGroup': position_group,
-    'from_competition_competition_area': from_area,
-    'to_competition_competition_area': to_area,
-    'value_per_age': market_value / transfer_age if transfer_age > 0 else 0,
-    'value_age_product': transfer_age * market_value,
-    'team_market_value_relation': to_team_market_value / from_team_market_value if from_team_market_value > 0 else 0
-})
-
-# Convert to DataFrame
-input_df = pd.DataFrame([data])
-
-# Cast to categorical types
-for col, cats in category_mappings.items():
-    if col in input_df.columns:
-        input_df[col] = pd.Categorical(input_df[col], categories=cats)
+input_cards()
+laps.lap("input_widgets")
 
 
 # === ACTION BUTTONS & OUTPUT ===
 
-# Layout for predict button and result
-col_l, col_m = st.columns([1, 6])
-
-with col_l:
-    predict_clicked = st.button("🔮 Predict")
-   
-
 # Convert hex color to RGBA
 def hex_to_rgba(hex_color, alpha=0.5):
     hex_color = hex_color.lstrip("#")
     r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
     return f"rgba({r}, {g}, {b}, {alpha})"
 
-# Prediction pipeline
-if predict_clicked:
-    with st.spinner("Running prediction..."):
-        # Original model prediction
-        xgb_pred = model.predict(input_df)  # returns an array
-        
-        # GAM metamodel prediction based on original model's output
-        final_pred = gam_model.predict(xgb_pred.reshape(-1, 1))
-
-        # Variables for similar player transfer
-        input_query = {
-            #"height": height,
-            "mainPosition": main_position,
-            "positionGroup": position_group,
-            #"foot": foot,
-            "transferAge": transfer_age,
-            "marketvalue_closest": market_value,
-            "toTeam_marketValue": to_team_market_value,
-            "fromTeam_marketValue": from_team_market_value,
-            "percentage_played_before": percentage_played_before,
-            "scorer_before_grouped_category": scorer_raw,
-            "clean_sheets_before": clean_sheets_before,  # Falls du das dynamisch brauchst, kannst du das noch einbauen
-            #"value_age_product": transfer_age * market_value,
-            #"value_per_age": market_value / transfer_age if transfer_age > 0 else 0,
-            'from_competition_competition_area': from_area,
-            'to_competition_competition_area': to_area,
-            'from_competition_competition_level': from_level,
-            'to_competition_competition_level': to_level,
-            'team_market_value_relation': to_team_market_value / from_team_market_value if from_team_market_value > 0 else 0
-
-        }
-
-        # Function for finding similar transfers
-        def find_similar_players(input_data, df, top_n=3):
-            features = list(input_data.keys())
-            id_cols = ['playerId', 'playerName', 'mainPosition', "percentage_played", 'season']
-
-            # dont use duplicates
-            all_cols = list(dict.fromkeys(features + id_cols))
-
-            df_subset = df[all_cols].dropna().copy()
-            df_subset.reset_index(drop=True, inplace=True)
-
-            for col in df_subset.select_dtypes(include='object').columns:
-                df_subset[col] = df_subset[col].astype(str)
-                if col in input_data:
-                    input_data[col] = str(input_data[col])
-
-            # similar transfer should be same competition level
-            df_subset = df_subset[
-             (df_subset['mainPosition'] == input_data['mainPosition']) &
-             (df_subset['from_competition_competition_level'] == input_data['from_competition_competition_level']) &
-             (df_subset['to_competition_competition_level'] == input_data['to_competition_competition_level'])
-            ].copy()
-
-            df_subset = df_subset.sort_values("season", ascending=False).drop_duplicates("playerId", keep="first").reset_index(drop=True)
-
-            df_encoded = pd.get_dummies(df_subset[features])
-            input_encoded = pd.get_dummies(pd.DataFrame([input_data]))
-            df_encoded, input_encoded = df_encoded.align(input_encoded, join="inner", axis=1)
-
-            scaler = StandardScaler()
-            df_scaled = scaler.fit_transform(df_encoded)
-            input_scaled = scaler.transform(input_encoded)
-
-            df_subset["distance"] = cdist(df_scaled, input_scaled).flatten()
-            return df_subset.nsmallest(top_n, "distance")[["playerName", "mainPosition", "season", "percentage_played", "distance"]]
-
-
-        similar_players = find_similar_players(input_query, reference_df)
-
-        # Interpretion of prediction
-        if final_pred < 20:
-            msg, color = "Not expected to play", "#FF4B4B"
-        elif final_pred < 40:
-            msg, color = "Expected to Be a Substitute", "#FFA500"
-        elif final_pred < 60:
-            msg, color = "Expected to Be a Rotation Player", "#32CD32"
-        elif final_pred < 90:
-            msg, color = "Expected to Be a Key Player", "#008000"
-        else: 
-            msg, color = "Next Starplayer", "#015801"
-
-        rgba_bg = hex_to_rgba(color, alpha=0.6)  # 0.6 of transparency
-
-        with col_m:
-
-            # Display result card
-            st.markdown(f"""
-            <div style='
-                background-color: {rgba_bg};
-                height: 80px;
-                display: flex;
-                flex-direction: column;
-                justify-content: center;
-                border-radius: 12px;
-                text-align: center;
-                letter-spacing: 0.5px;
-                box-shadow: 0 4px 12px rgba(0,0,0,0.3);'>
-                <span style='color: white; font-size: 1.3rem; font-weight: 600;'>
-                    {msg} – Expected Playing Time: <strong>{final_pred[0]:.2f}%</strong>
-                </span>
-            </div>
-            """, unsafe_allow_html=True)
-
-            #show similar players
-            st.markdown("### 👥 Top 3 Similar Transfers")
-            for _, row in similar_players.iterrows():
-                st.markdown(f"- **{row['playerName']}** | Position: {row['mainPosition']} | Season: {row['season']} | Playing %: {row['percentage_played']}%")
-
-# Debug option to show input vector
-if st.checkbox("Show feature vector"):
-    st.write({k: v for k, v in data.items() if v != 0})
 
+# Result panel as a fragment: Predict re-executes and re-sends only this panel, for the
+# inputs the cards stored last. The result stays on screen while the inputs are edited.
+@timed_fragment("result_fragment")
+def result_panel():
+    # Layout for predict button and result
+    col_l, col_m = st.columns([1, 6])
+
+    with col_l:
+        predict_clicked = st.button("🔮 Predict", key="predict")
+
+    # Prediction pipeline
+    if predict_clicked:
+        data = committed_input()
+        input_df = model_input(data)
+        with st.spinner("Running prediction..."):
+            models = prediction_models()
+            reference_snapshot = current_reference_snapshot()
+
+            # Identical inputs with unchanged models and reference data are served from the cache;
+            # a speculative run of these inputs that is still going is waited for (up to a timeout), not repeated
+            cache_key = prediction_cache_key(input_df, reference_snapshot.version)
+            if speculator is not None:
+                with stage("speculation_wait"):
+                    speculator.wait(cache_key)
+            cached = prediction_cache.get(cache_key)
+            if cached is None:
+                cached = prediction_cache.put(cache_key, compute_prediction(data, input_df, models, reference_snapshot))
+            xgb_pred, final_pred, similar_players, contribs, chart = cached
+            st.session_state["predicted_input"] = data
+
+            # Interpretion of prediction
+            msg, color = playing_time_band(final_pred[0])
+
+            rgba_bg = hex_to_rgba(color, alpha=0.6)  # 0.6 of transparency
+
+            with col_m:
+
+                # Display result card
+                st.markdown(f"""
+                <div style='
+                    background-color: {rgba_bg};
+                    height: 80px;
+                    display: flex;
+                    flex-direction: column;
+                    justify-content: center;
+                    border-radius: 12px;
+                    text-align: center;
+                    letter-spacing: 0.5px;
+                    box-shadow: 0 4px 12px rgba(0,0,0,0.3);'>
+                    <span style='color: white; font-size: 1.3rem; font-weight: 600;'>
+                        {msg} – Expected Playing Time: <strong>{final_pred[0]:.2f}%</strong>
+                    </span>
+                </div>
+                """, unsafe_allow_html=True)
+
+                #show similar players
+                st.markdown("### 👥 Top 3 Similar Transfers")
+                for _, row in similar_players.iterrows():
+                    st.markdown(f"- **{row['playerName']}** | Position: {row['mainPosition']} | Season: {row['season']} | Playing %: {row['percentage_played']}%")
+
+                # Contributions of the inputs to the XGBoost output of this transfer
+                with st.expander("🔍 Why this prediction?"):
+                    st.image(chart, width="stretch")
+                    st.caption(f"SHAP contributions to the XGBoost output ({xgb_pred[0]:.2f}); "
+                               f"the GAM metamodel calibrates it to {final_pred[0]:.2f}%.")
+
+result_panel()
+laps.lap("prediction")
+
+
+# === What-if Sensitivity ===
+
+# The sweep reruns on its own and varies the inputs the cards stored last
+@timed_fragment("what_if_fragment")
+def what_if_sweep():
+    with st.expander("🔁 What-if: Vary One or Two Inputs"):
+        sweep_labels = {col: label for col, (label, _, _, _) in SWEEP_INPUTS.items()}
+        sweep_x = st.selectbox("Vary", list(SWEEP_INPUTS), format_func=sweep_labels.get, key="sweep_x")
+        sweep_y = st.selectbox("Against (optional)", [None] + [c for c in SWEEP_INPUTS if c != sweep_x],
+                               format_func=lambda c: "—" if c is None else sweep_labels[c], key="sweep_y")
+        sweep_points = st.slider("Grid points per input", 10, 50, 25, key="sweep_points")
+
+        if st.button("Run What-if", key="run_sweep"):
+            import matplotlib.pyplot as plt  # Sweep plots
+
+            data = committed_input()
+            x_values = sweep_values(sweep_x, sweep_points)
+            y_values = sweep_values(sweep_y, sweep_points) if sweep_y else None
+            model, _, calibrator = prediction_models()
+            sweep_pred = run_sweep(model, calibrator, feature_builder, data, sweep_x, x_values, sweep_y, y_values)
+            current_x = data[sweep_x] / SWEEP_INPUTS[sweep_x][3]
+
+            fig, ax = plt.subplots(figsize=(8, 4))
+            if sweep_y is None:
+                ax.plot(x_values, sweep_pred, color="#ba0c2f", linewidth=2)
+                ax.axvline(current_x, color="grey", linestyle="--")
+                for upper, _, color in PLAYING_TIME_BANDS[:-1]:
+                    ax.axhline(upper, color=color, linestyle=":", linewidth=1)
+                ax.set_ylabel("Expected Playing Time (%)")
+            else:
+                mesh = ax.imshow(sweep_pred, origin="lower", aspect="auto", cmap="RdYlGn", vmin=0, vmax=100,
+                                 extent=[x_values[0], x_values[-1], y_values[0], y_values[-1]])
+                fig.colorbar(mesh, ax=ax, label="Expected Playing Time (%)")
+                ax.plot(current_x, data[sweep_y] / SWEEP_INPUTS[sweep_y][3], "ko")
+                ax.set_ylabel(sweep_labels[sweep_y])
+            ax.set_xlabel(sweep_labels[sweep_x])
+            st.pyplot(fig)
+            plt.close(fig)
+
+what_if_sweep()
+
+
+# === Candidate Search ===
+
+# Candidate pool scored in batches, once per process and models; the reference file fingerprint reloads it
+@st.cache_resource(max_entries=1)
+def load_candidates(model_fingerprint, gam_fingerprint, reference_fingerprint):
+    model, _, calibrator = prediction_models()
+    return load_candidate_search(model, calibrator, feature_builder)
+
+
+# Players of the reference data ranked for the target club of the input cards. The pool is
+# scored once per target club profile; changing the filters reruns only this panel on the cached scores.
+@timed_fragment("candidate_fragment")
+def candidate_panel():
+    with st.expander("🔎 Candidate Search: Best Fits for the Target Club"):
+        data = committed_input()
+        st.caption(f"Target club: {data['toTeam_marketValue'] / 1_000_000:,.1f} €M, "
+                   f"{data['to_competition_competition_area']} level {data['to_competition_competition_level']} (from the Transfer Details card)")
+        col_budget, col_group, col_age, col_top = st.columns(4)
+        budget = col_budget.number_input("Max Player Market Value (€M)", 0.0, 200.0, 15.0, key="candidate_budget")
+        candidate_group = col_group.selectbox("Position Group", [None] + [p for p in valid_position_groups if p.lower() != "other"],
+                                              format_func=lambda p: "All" if p is None else position_group_display_map.get(p, p.title()),
+                                              key="candidate_group")
+        max_age = col_age.slider("Max Transfer Age", 16, 40, 40, key="candidate_age")
+        top_n = col_top.slider("Candidates", 5, 50, 10, key="candidate_top")
+
+        if st.checkbox("Search reference players", key="candidate_search"):
+            from reference_store import reference_data_path  # Reference file
+
+            model_fingerprint, gam_fingerprint = file_fingerprint(MODEL_PATH), file_fingerprint(GAM_MODEL_PATH)
+            with st.spinner("Scoring candidates..."):
+                search = load_candidates(model_fingerprint, gam_fingerprint, file_fingerprint(reference_data_path()))
+                candidates = search.search(data["toTeam_marketValue"], data["to_competition_competition_area"],
+                                           data["to_competition_competition_level"], budget=budget,
+                                           position_group=candidate_group, max_age=max_age, top_n=top_n)
+            st.dataframe(pd.DataFrame({
+                "Player": candidates["playerName"],
+                "Position": candidates["mainPosition"].map(lambda p: main_position_display_map.get(p, p)),
+                "Age": candidates["transferAge"],
+                "Market Value (€M)": candidates["marketvalue_closest"],
+                "Current Club (€M)": candidates["toTeam_marketValue"] / 1_000_000,
+                "Current League": candidates["to_competition_competition_area"].astype(str) + " "
+                                  + candidates["to_competition_competition_level"].astype(str),
+                "Playing % Now": candidates["percentage_played"],
+                "Expected Playing % at Target": candidates["predicted_playing_time"],
+            }), hide_index=True)
+            st.caption(f"Each of {len(search.pool):,} players moves permanently from their current club to the target club. "
+                       "Current club and playing time come from their latest transfer, as do age, market value "
+                       "and the scoring and clean-sheet groups.")
+
+candidate_panel()
+
+
+# Debug options rerun on their own as well
+@timed_fragment("diagnostics_fragment")
+def diagnostics():
+    # Debug option to show input vector
+    if st.checkbox("Show feature vector"):
+        input_df = model_input(committed_input())
+        st.write({k: v for k, v in input_df.iloc[0].items() if v != 0})
+        cache_stats = prediction_cache.stats()
+        st.caption(f"Prediction cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+                   f"{cache_stats['size']}/{cache_stats['maxsize']} entries")
+        if speculator is not None:
+            speculation_stats = speculator.stats()
+            st.caption("Speculative predictions: " + ", ".join(f"{count} {name}" for name, count in speculation_stats.items()))
+
+    # Diagnostics: stage timings of this rerun and rolling percentiles over all sessions
+    if st.checkbox("Show timings"):
+        run_timings = current_run()
+        st.dataframe(pd.DataFrame([
+            {
+                "stage": name,
+                "this rerun (ms)": run_timings[name] * 1000 if name in run_timings else None,
+                "p50 (ms)": stats["p50_s"] * 1000,
+                "p95 (ms)": stats["p95_s"] * 1000,
+                "p99 (ms)": stats["p99_s"] * 1000,
+                "count": stats["count"],
+            }
+            for name, stats in registry.summary().items()
+        ]), hide_index=True)
+
+diagnostics()
+
+
+# === Model Accuracy ===
+
+# Backtest tables of the stored test predictions; the disk cache is keyed by the file hash
+@st.cache_data(max_entries=1)
+def load_accuracy_tables(path, fingerprint):
+    return load_evaluation(path)
+
+# The breakdown selectors rerun only the accuracy panel
+@timed_fragment("accuracy_fragment")
+def accuracy_panel():
+    with st.expander("📊 Model Accuracy (Backtest)"):
+        if not os.path.exists(PREDICTIONS_PATH):
+            st.info(f"No backtest available: {PREDICTIONS_PATH} was not found.")
+            return
+        accuracy = load_accuracy_tables(PREDICTIONS_PATH, file_fingerprint(PREDICTIONS_PATH))
+        overall = accuracy["overall"].iloc[0]
+        col_mae, col_rmse, col_bias, col_n = st.columns(4)
+        col_mae.metric("MAE", f"{overall['mae']:.2f} pp")
+        col_rmse.metric("RMSE", f"{overall['rmse']:.2f} pp")
+        col_bias.metric("Bias (actual − predicted)", f"{overall['bias']:+.2f} pp")
+        col_n.metric("Test transfers", f"{int(overall['count']):,}")
+
+        breakdown = st.selectbox("Break down by", list(GROUPINGS), format_func=GROUPINGS.get, key="accuracy_by")
+        st.dataframe(accuracy[f"errors_by_{breakdown}"], hide_index=True)
+
+        # Calibration: mean actual playing time per predicted bin, overall or for one group
+        calibration = accuracy["calibration"]
+        groups = ["All transfers"] + accuracy[f"errors_by_{breakdown}"][breakdown].astype(str).tolist()
+        calibration_group = st.selectbox("Calibration curve for", groups, key="accuracy_group")
+        if calibration_group != "All transfers":
+            by_group = accuracy[f"calibration_by_{breakdown}"]
+            calibration = by_group[by_group[breakdown].astype(str) == calibration_group]
+        st.line_chart(calibration.set_index("bin")[["mean_predicted", "mean_actual"]])
+        st.caption("Well calibrated bins have a mean actual playing time close to the mean prediction.")
+
+accuracy_panel()
 
-# === Feature Importances ===
-import matplotlib.pyplot as plt
-import numpy as np
 
+# === Feature Importances ===
 with st.expander("📈 Show Feature Importances"):
-    st.image("Feature_Importances_SHAP.png", caption="Top Feature Importances", use_container_width=True)
+    st.image("Feature_Importances_SHAP.png", caption="Top Feature Importances", width="stretch")
 
 
 # === Footer Section with credits ===
@@ -684,3 +967,6 @@ st.markdown("""
     </div>
     """, unsafe_allow_html=True)
 
+laps.total("rerun_total")
+log_run("rerun", current_run())
+script_running = False
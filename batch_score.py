@@ -0,0 +1,221 @@
+# === Batch Scoring of Candidate Transfers ===
+# Usage: python batch_score.py candidates.csv -o scored.csv [--chunk-size 5000] [--explain] [--workers 4]
+#        python batch_score.py candidates.csv --scaling [--workers 8]
+#
+# The input uses the column layout of xgboost_predictions_test.csv, as CSV or
+# Parquet. Files are read, scored and written one chunk at a time, so memory
+# stays bounded by the chunk size however large the input is. With --workers,
+# chunks are scored in a process pool whose workers load the models once.
+import argparse  # Command line interface
+import os  # Output files, CPU count
+from collections import deque  # Chunks in flight
+from concurrent.futures import ProcessPoolExecutor  # Worker processes
+import resource  # Peak memory
+import time  # Throughput measurement
+import pandas as pd  # Data handling
+from features import FeatureBuilder  # Model feature frame
+from explain import contribution_columns  # SHAP contributions
+from pipeline import (  # Models and prediction chain
+    MODEL_PATH, GAM_MODEL_PATH, CATEGORY_MAPPINGS_PATH,
+    load_model, load_gam_model, load_category_mappings,
+    predict_playing_time, playing_time_bands,
+)
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+# Score one chunk of raw transfers with a single model call. When the chunk has
+# the observed playing time, Residual = Actual - prediction as in the test CSV.
+def score_chunk(chunk, builder, model, gam_model, explain=False):
+    features = builder.build(chunk)
+    xgb_pred, final_pred = predict_playing_time(model, gam_model, features)
+    chunk = chunk.assign(
+        xgb_prediction=xgb_pred,
+        predicted_playing_time=final_pred,
+        playing_time_band=playing_time_bands(final_pred),
+    )
+    if "Actual" in chunk.columns:
+        chunk["Residual"] = pd.to_numeric(chunk["Actual"], errors="coerce") - chunk["predicted_playing_time"]
+    if explain:
+        chunk = chunk.join(contribution_columns(model, features))
+    return chunk
+
+
+# Read a CSV or Parquet file in chunks of at most chunk_size rows. The text columns (the
+# keys of category_mappings) are read as str in every chunk, so no chunk's dtypes depend on
+# the values it happens to hold; dictionary-encoded Parquet columns become plain objects.
+def read_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, text_columns=()):
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq  # Row batches
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            chunk = batch.to_pandas()
+            for col in chunk.columns:
+                if col in text_columns or isinstance(chunk[col].dtype, pd.CategoricalDtype):
+                    values = chunk[col].astype(object)
+                    chunk[col] = values.where(values.isna(), values.astype(str))
+            yield chunk
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype={col: str for col in text_columns})
+
+
+# Appends scored chunks to a CSV or Parquet file
+class ChunkWriter:
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.endswith(".parquet")
+        self.writer = None
+        self.started = False
+
+    def write(self, chunk):
+        if self.parquet:
+            import pyarrow as pa  # Arrow tables
+            import pyarrow.parquet as pq  # Parquet output
+
+            if self.writer is None:
+                # one schema for the whole file; a text column with no values in the first chunk is still text
+                schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                for i, field in enumerate(schema):
+                    if pa.types.is_null(field.type):
+                        schema = schema.set(i, field.with_type(pa.string()))
+                self.writer = pq.ParquetWriter(self.path, schema)
+            table = pa.Table.from_pandas(chunk, schema=self.writer.schema, preserve_index=False)
+            self.writer.write_table(table)
+        else:
+            chunk.to_csv(self.path, mode="a" if self.started else "w", header=not self.started, index=False)
+        self.started = True
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+# Stream a file through the model chunk by chunk; returns the number of rows scored
+def score_file(input_path, output_path, model, gam_model, category_mappings, chunk_size=DEFAULT_CHUNK_SIZE, explain=False):
+    builder = FeatureBuilder(model.feature_names_in_, category_mappings)
+    chunks = read_chunks(input_path, chunk_size, list(category_mappings))
+    scored = (score_chunk(chunk, builder, model, gam_model, explain) for chunk in chunks)
+    return _write_chunks(scored, output_path)
+
+
+# Write scored chunks in order; a failed run removes the partial output
+def _write_chunks(scored, output_path):
+    writer = ChunkWriter(output_path) if output_path else None
+    rows = 0
+    try:
+        for chunk in scored:
+            if writer is not None:
+                writer.write(chunk)
+            rows += len(chunk)
+    except BaseException:
+        if writer is not None:
+            writer.close()
+            if os.path.exists(output_path):
+                os.remove(output_path)
+        raise
+    if writer is not None:
+        writer.close()
+    return rows
+
+
+# === Parallel Scoring ===
+
+# Models of a worker process, loaded once by the pool initializer
+_worker = {}
+
+
+def _init_worker(model_path, gam_model_path, mappings_path, nthread, explain):
+    model = load_model(model_path)
+    model.set_params(n_jobs=nthread)
+    _worker.update(
+        model=model,
+        gam_model=load_gam_model(gam_model_path),
+        builder=FeatureBuilder(model.feature_names_in_, load_category_mappings(mappings_path)),
+        explain=explain,
+    )
+
+
+def _score_in_worker(chunk):
+    return score_chunk(chunk, _worker["builder"], _worker["model"], _worker["gam_model"], _worker["explain"])
+
+
+# Chunks scored in a process pool, yielded in input order with at most two chunks per worker in flight
+def _parallel_chunks(chunks, pool, workers):
+    in_flight = deque()
+    for chunk in chunks:
+        in_flight.append(pool.submit(_score_in_worker, chunk))
+        if len(in_flight) >= 2 * workers:
+            yield in_flight.popleft().result()
+    while in_flight:
+        yield in_flight.popleft().result()
+
+
+# XGBoost threads per worker so that workers × threads does not exceed the cores
+def threads_per_worker(workers):
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+# Stream a file through a pool of worker processes; each worker loads the models from the given paths once.
+# Rows come out in input order, but the predictions are not byte-identical to a single-process run:
+# XGBoost sums the trees in a different order with another thread count, so values can differ by
+# about 2e-5. Compare the two outputs with a tolerance.
+def score_file_parallel(input_path, output_path, model_path, gam_model_path, mappings_path, workers,
+                        chunk_size=DEFAULT_CHUNK_SIZE, explain=False):
+    initargs = (model_path, gam_model_path, mappings_path, threads_per_worker(workers), explain)
+    chunks = read_chunks(input_path, chunk_size, list(load_category_mappings(mappings_path)))
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=initargs) as pool:
+        return _write_chunks(_parallel_chunks(chunks, pool, workers), output_path)
+
+
+# Throughput for 1, 2, 4, … up to max_workers processes, including worker start-up, scoring without writing output
+def scaling_report(input_path, model_path, gam_model_path, mappings_path, max_workers, chunk_size=DEFAULT_CHUNK_SIZE):
+    counts = sorted({1, max_workers} | {2 ** i for i in range(1, max_workers.bit_length()) if 2 ** i < max_workers})
+    report = []
+    for workers in counts:
+        start = time.perf_counter()
+        rows = score_file_parallel(input_path, None, model_path, gam_model_path, mappings_path, workers, chunk_size)
+        elapsed = time.perf_counter() - start
+        report.append({"workers": workers, "threads_per_worker": threads_per_worker(workers),
+                       "rows": rows, "seconds": elapsed, "rows_per_s": rows / elapsed})
+    for entry in report:
+        entry["speedup"] = entry["rows_per_s"] / report[0]["rows_per_s"]
+    return pd.DataFrame(report)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV or Parquet file of candidate transfers.")
+    parser.add_argument("input", help="CSV or Parquet in the layout of xgboost_predictions_test.csv")
+    parser.add_argument("-o", "--output", help="CSV or Parquet file to write the predictions to")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows read, scored and written at a time")
+    parser.add_argument("--explain", action="store_true", help="add SHAP contribution columns (contrib_<feature>, contrib_bias)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: score in this process; with --scaling, all cores)")
+    parser.add_argument("--scaling", action="store_true", help="report throughput for 1 up to --workers processes")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--gam-model", default=GAM_MODEL_PATH)
+    parser.add_argument("--mappings", default=CATEGORY_MAPPINGS_PATH)
+    args = parser.parse_args(argv)
+    if not args.scaling and not args.output:
+        parser.error("-o/--output is required unless --scaling is given")
+
+    if args.scaling:
+        report = scaling_report(args.input, args.model, args.gam_model, args.mappings, args.workers or os.cpu_count() or 1, args.chunk_size)
+        print(report.to_string(index=False, float_format="{:,.2f}".format))
+        return
+
+    start = time.perf_counter()
+    if args.workers and args.workers > 1:
+        rows = score_file_parallel(args.input, args.output, args.model, args.gam_model, args.mappings,
+                                   args.workers, args.chunk_size, args.explain)
+    else:
+        model = load_model(args.model)
+        gam_model = load_gam_model(args.gam_model)
+        category_mappings = load_category_mappings(args.mappings)
+        rows = score_file(args.input, args.output, model, gam_model, category_mappings, args.chunk_size, args.explain)
+    elapsed = time.perf_counter() - start
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Scored {rows} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s), peak memory {peak_mb:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
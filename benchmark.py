@@ -0,0 +1,311 @@
+# === Benchmarks for the Dashboard's Hot Paths ===
+# Usage: python benchmark.py [-o results.json] [--sizes 10000 100000 1000000] [--compare baseline.json]
+#
+# Runs offline on synthetic transfers generated with the schema of
+# xgboost_predictions_test.csv. When model2.json is missing, a small stand-in
+# XGBoost model is trained on synthetic data so every benchmark can still run.
+import argparse  # Command line interface
+import json  # Result files
+import os  # Working directories
+import platform  # Environment metadata
+import shutil  # Temporary app copies
+import subprocess  # Git commit of the results
+import tempfile  # Scratch directory
+import time  # Timing
+from pathlib import Path  # File paths
+import numpy as np  # Synthetic data
+import pandas as pd  # Data handling
+import xgboost as xgb  # Stand-in model
+from batch_score import score_chunk, score_file  # Batch scoring
+from build_lookups import PREDICTIONS_PATH  # Backtest predictions for the accuracy panel
+from features import FeatureBuilder  # Model feature frame
+from pipeline import (  # Models and prediction chain
+    MODEL_PATH, GAM_MODEL_PATH, CATEGORY_MAPPINGS_PATH, REFERENCE_PATH,
+    load_model, load_gam_model, load_category_mappings, predict_playing_time,
+)
+from similarity import SIMILARITY_FEATURES, SimilarityIndex, find_similar_players  # Similar transfers
+from tree_engine import CompiledTrees, max_deviation  # Compiled single-row inference
+from gam_table import GamTable  # GAM lookup table
+
+APP_PATH = "app_final.py"
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+SEASONS = ["2018/2019", "2019/2020", "2020/2021", "2021/2022", "2022/2023", "2023/2024"]
+
+
+# Synthetic transfers with the columns of xgboost_predictions_test.csv plus the reference columns of df.csv
+def make_transfers(n, category_mappings, seed=0):
+    rng = np.random.default_rng(seed)
+
+    def pick(col):
+        return rng.choice(np.array(category_mappings[col], dtype=object), n)
+
+    age = rng.integers(16, 38, n).astype(float)
+    value = np.round(rng.lognormal(-0.5, 1.3, n), 2)
+    from_value = np.round(rng.lognormal(17.3, 1.2, n), -3)
+    to_value = np.round(rng.lognormal(17.2, 1.2, n), -3)
+    from_area, to_area = pick("from_competition_competition_area"), pick("to_competition_competition_area")
+    actual = np.round(rng.uniform(0, 100, n), 2)
+    df = pd.DataFrame({
+        "height": rng.normal(183, 6, n).round(),
+        "mainPosition": pick("mainPosition"),
+        "positionGroup": pick("positionGroup"),
+        "foot": pick("foot"),
+        "transferAge": age,
+        "isLoan": rng.random(n) < 0.14,
+        "wasLoan": rng.random(n) < 0.14,
+        "marketvalue_closest": value,
+        "fee_to_value_ratio": np.where(rng.random(n) < 0.85, np.nan, rng.exponential(1.2, n)),
+        "foreign_transfer": (from_area != to_area).astype(int),
+        "from_competition_competition_area": from_area,
+        "from_competition_competition_level": rng.integers(1, 5, n).astype(float),
+        "fromTeam_marketValue": from_value,
+        "to_competition_competition_area": to_area,
+        "to_competition_competition_level": rng.integers(1, 5, n).astype(float),
+        "toTeam_marketValue": to_value,
+        "team_market_value_relation": np.round(to_value / from_value, 2),
+        "percentage_played_before": np.round(rng.uniform(0, 100, n), 2),
+        "was_joker": pick("was_joker"),
+        "clean_sheets_before_grouped": pick("clean_sheets_before_grouped"),
+        "performance_ratio_before": np.where(rng.random(n) < 0.4, np.nan, rng.exponential(0.003, n)),
+        "scorer_before_grouped_category": pick("scorer_before_grouped_category"),
+        "value_age_product": age * value,
+        "value_per_age": value / age,
+        "Actual": actual,
+    })
+    df["Predicted"] = np.round(np.clip(actual + rng.normal(0, 20, n), 0, 100), 4)
+    df["Residual"] = df["Actual"] - df["Predicted"]
+
+    player_ids = rng.integers(0, max(n // 2, 1), n)
+    df["playerId"] = player_ids
+    df["playerName"] = pd.Series(player_ids).map("Player {}".format)
+    df["season"] = rng.choice(SEASONS, n)
+    df["percentage_played"] = actual
+    df["clean_sheets_before"] = rng.integers(0, 20, n)
+    return df
+
+
+# Stand-in model with the real feature layout, used when model2.json is not available
+def train_stand_in_model(category_mappings, path):
+    data = make_transfers(5000, category_mappings, seed=1)
+    feature_names = list(data.columns[:data.columns.get_loc("Actual")])
+    features = FeatureBuilder(feature_names, category_mappings).build(data)
+    model = xgb.XGBRegressor(n_estimators=200, max_depth=6, enable_categorical=True, tree_method="hist")
+    model.fit(features, data["Actual"])
+    model.save_model(path)
+
+
+# Wall-clock statistics over repeated calls
+def measure(fn, repeat=5, warmup=1):
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {"min_s": min(times), "median_s": float(np.median(times)), "mean_s": float(np.mean(times)), "repeat": repeat}
+
+
+# Similarity query in the layout used by the dashboard
+def similarity_query(row):
+    query = {col: row[col] for col in SIMILARITY_FEATURES}
+    query["clean_sheets_before"] = row["clean_sheets_before_grouped"]
+    return query
+
+
+def bench_models(model_path, results):
+    results["model_load"] = measure(lambda: load_model(model_path), repeat=5)
+    results["gam_load"] = measure(lambda: load_gam_model(GAM_MODEL_PATH), repeat=5)
+
+
+def bench_pipeline(model, gam_model, category_mappings, results, batch_size=10_000):
+    builder = FeatureBuilder(model.feature_names_in_, category_mappings)
+    batch = make_transfers(batch_size, category_mappings, seed=2)
+    single = batch.iloc[:1]
+    single_features, batch_features = builder.build(single), builder.build(batch)
+
+    results["feature_frame_single"] = measure(lambda: builder.build(single), repeat=50)
+    results["feature_frame_batch"] = measure(lambda: builder.build(batch), repeat=5)
+    results["predict_single"] = measure(lambda: predict_playing_time(model, gam_model, single_features), repeat=50)
+    results["predict_batch"] = measure(lambda: predict_playing_time(model, gam_model, batch_features), repeat=5)
+    results["predict_batch"]["rows"] = batch_size
+    results["predict_batch"]["rows_per_s"] = batch_size / results["predict_batch"]["median_s"]
+
+    compiled = CompiledTrees(model.get_booster())
+    results["xgboost_predict_single"] = measure(lambda: model.predict(single_features), repeat=50)
+    results["compiled_predict_single"] = measure(lambda: compiled.predict(single_features), repeat=50)
+    results["compiled_predict_single"]["max_deviation"] = max_deviation(compiled, model, builder.dtypes)
+
+    table = GamTable(gam_model)
+    xgb_single = model.predict(single_features).reshape(-1, 1)
+    results["gam_predict_single"] = measure(lambda: gam_model.predict(xgb_single), repeat=50)
+    results["gam_table_predict_single"] = measure(lambda: table.predict(xgb_single), repeat=50)
+    results["gam_table_predict_single"]["max_error"] = table.max_error
+
+
+# Queries of a batch whose query_batch result differs from query(). The batch mixes the
+# dashboard's layout (clean-sheet bands as text), NaN features and a frame without clean_sheets_before.
+def batch_mismatches(index, batch, seed=7):
+    rng = np.random.default_rng(seed)
+    mixed = batch.reset_index(drop=True).astype({"clean_sheets_before": object, "percentage_played_before": float})
+    mixed.loc[rng.random(len(mixed)) < 0.2, "clean_sheets_before"] = "10-15"
+    mixed.loc[rng.random(len(mixed)) < 0.2, "percentage_played_before"] = np.nan
+    mismatches = 0
+    for queries in (mixed, mixed.drop(columns=["clean_sheets_before"])):
+        result = index.query_batch(queries)
+        for query_id, row in queries.iterrows():
+            single = index.query(row.to_dict())
+            batched = result[result["query_id"] == query_id]
+            if (single["playerName"].tolist() != batched["playerName"].tolist()
+                    or not np.allclose(single["distance"].to_numpy(dtype=float), batched["distance"].to_numpy())):
+                mismatches += 1
+    return mismatches
+
+
+def bench_similarity(category_mappings, sizes, results):
+    for size in sizes:
+        reference = make_transfers(size, category_mappings, seed=3)
+        queries = [similarity_query(row) for _, row in reference.sample(5, random_state=4).iterrows()]
+        repeat = 3 if size >= 1_000_000 else 5
+
+        start = time.perf_counter()
+        index = SimilarityIndex(reference)
+        build_s = time.perf_counter() - start
+
+        results[f"find_similar_players_{size}"] = measure(
+            lambda: [find_similar_players(q, reference) for q in queries], repeat=repeat, warmup=0)
+        results[f"similarity_index_build_{size}"] = {"min_s": build_s, "median_s": build_s, "mean_s": build_s, "repeat": 1}
+        results[f"similarity_index_query_{size}"] = measure(lambda: [index.query(q) for q in queries], repeat=repeat)
+        batch = reference.sample(1000, random_state=6)[SIMILARITY_FEATURES]
+        results[f"similarity_index_batch_{size}"] = measure(lambda: index.query_batch(batch), repeat=repeat)
+        results[f"similarity_index_batch_{size}"]["queries_per_call"] = len(batch)
+        mismatches = batch_mismatches(index, batch.iloc[:200])
+        results[f"similarity_index_batch_{size}"]["mismatches"] = mismatches
+        if mismatches:
+            raise RuntimeError(f"query_batch differs from query() for {mismatches} queries")
+        for key in (f"find_similar_players_{size}", f"similarity_index_query_{size}"):
+            results[key]["queries_per_call"] = len(queries)
+
+
+# Batch scoring of files in chunks: CSV → Parquet → CSV. The CSV holds was_joker as
+# True/False in its first chunks and "other" only in its last, so pandas parses the column
+# as bool in some chunks and as text in others; the Parquet file holds dictionary-encoded text.
+def bench_batch(model, gam_model, category_mappings, workdir, results, rows=5000, chunk_size=1000):
+    transfers = make_transfers(rows, category_mappings, seed=8)
+    transfers = transfers.sort_values("was_joker", key=lambda s: s.astype(str) == "other", kind="stable")
+    csv_path, parquet_path = str(Path(workdir) / "batch.csv"), str(Path(workdir) / "batch.parquet")
+    transfers.to_csv(csv_path, index=False)
+    builder = FeatureBuilder(model.feature_names_in_, category_mappings)
+    expected = score_chunk(pd.read_csv(csv_path), builder, model, gam_model)["predicted_playing_time"].to_numpy()
+
+    parquet_input = str(Path(workdir) / "batch_input.parquet")
+    pd.read_csv(csv_path, dtype={col: str for col in category_mappings}).astype(
+        {col: "category" for col in category_mappings if col in transfers}).to_parquet(parquet_input, index=False)
+    runs = {"batch_csv_to_parquet": (csv_path, parquet_path), "batch_parquet_to_csv": (parquet_input, str(Path(workdir) / "batch_out.csv"))}
+    for name, (source, target) in runs.items():
+        results[name] = measure(lambda: score_file(source, target, model, gam_model, category_mappings, chunk_size), repeat=3)
+        scored = pd.read_parquet(target) if target.endswith(".parquet") else pd.read_csv(target)
+        if not np.allclose(scored["predicted_playing_time"].to_numpy(), expected):
+            raise RuntimeError(f"{name} differs from scoring the file in one chunk")
+        results[name]["rows_per_s"] = rows / results[name]["median_s"]
+
+
+# Scripted app reruns with Streamlit's AppTest, in a scratch copy with synthetic data where needed
+def bench_app(model_path, category_mappings, workdir, results):
+    from streamlit.testing.v1 import AppTest
+
+    app_dir = Path(workdir) / "app"
+    shutil.copytree(".", app_dir, ignore=shutil.ignore_patterns(".git", "__pycache__", "*.csv"))
+    if not (app_dir / MODEL_PATH).exists():
+        shutil.copy(model_path, app_dir / MODEL_PATH)
+    if Path(PREDICTIONS_PATH).exists():
+        shutil.copy(PREDICTIONS_PATH, app_dir / PREDICTIONS_PATH)
+    if Path(REFERENCE_PATH).exists():
+        shutil.copy(REFERENCE_PATH, app_dir / REFERENCE_PATH)
+    else:
+        make_transfers(20_000, category_mappings, seed=5).to_csv(app_dir / REFERENCE_PATH, index=False)
+
+    cwd = os.getcwd()
+    os.chdir(app_dir)
+    try:
+        at = AppTest.from_file(str(app_dir / APP_PATH), default_timeout=300)
+        start = time.perf_counter()
+        at.run()
+        results["app_first_run"] = {"min_s": time.perf_counter() - start, "repeat": 1}
+        results["app_rerun"] = measure(lambda: at.run(), repeat=5, warmup=0)
+        results["app_predict_click"] = measure(lambda: at.button[0].click().run(), repeat=5, warmup=0)
+        if at.exception:
+            raise RuntimeError(f"app raised: {at.exception}")
+    finally:
+        os.chdir(cwd)
+
+
+# Commit, interpreter and package versions stored with the results
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import sklearn  # Version metadata
+    import streamlit  # Version metadata
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "versions": {"pandas": pd.__version__, "numpy": np.__version__, "xgboost": xgb.__version__,
+                     "scikit-learn": sklearn.__version__, "streamlit": streamlit.__version__},
+    }
+
+
+# Print the speedup of each benchmark relative to a stored result file
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    print(f"{'benchmark':<40} {'baseline':>10} {'current':>10} {'speedup':>8}")
+    for name, current in results.items():
+        if name in baseline:
+            before, after = baseline[name]["min_s"], current["min_s"]
+            print(f"{name:<40} {before * 1000:>8.1f}ms {after * 1000:>8.1f}ms {before / after:>7.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard's hot paths.")
+    parser.add_argument("-o", "--output", help="JSON file for the results (default: benchmark_results/<commit>.json)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="reference rows for similarity search")
+    parser.add_argument("--skip-app", action="store_true", help="skip the AppTest reruns")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    args = parser.parse_args(argv)
+
+    category_mappings = load_category_mappings(CATEGORY_MAPPINGS_PATH)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        model_path = MODEL_PATH
+        if not Path(model_path).exists():
+            model_path = str(Path(workdir) / MODEL_PATH)
+            train_stand_in_model(category_mappings, model_path)
+
+        model, gam_model = load_model(model_path), load_gam_model(GAM_MODEL_PATH)
+        bench_models(model_path, results)
+        bench_pipeline(model, gam_model, category_mappings, results)
+        bench_similarity(category_mappings, args.sizes, results)
+        bench_batch(model, gam_model, category_mappings, workdir, results)
+        if not args.skip_app:
+            bench_app(model_path, category_mappings, workdir, results)
+
+    env = environment()
+    output = Path(args.output or f"benchmark_results/{env['commit'] or 'local'}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({"environment": env, "stand_in_model": not Path(MODEL_PATH).exists(), "results": results}, f, indent=2)
+
+    for name, r in results.items():
+        print(f"{name:<40} {r['min_s'] * 1000:>10.2f} ms")
+    print(f"Wrote {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+# === Build Web Assets ===
+# Usage: python build_assets.py
+#
+# Writes resized, web-optimized copies of the background and logos into static/,
+# which Streamlit serves as plain files (enableStaticServing in .streamlit/config.toml).
+from pathlib import Path  # File paths
+from PIL import Image  # Image resizing
+
+STATIC_DIR = Path("static")
+
+# Source image → (static file name, maximum size in px)
+ASSETS = {
+    "stadium.jpg": ("stadium.jpg", (1600, 1600)),
+    "1-fc-koln-logo-png_seeklogo-266469.png": ("fc_logo.png", (160, 160)),
+    "Uni_blau2.png": ("uni_logo.png", (160, 160)),
+}
+
+
+# Resize one image and save it in a web-friendly encoding
+def build_asset(source, target, max_size):
+    image = Image.open(source)
+    image.thumbnail(max_size, Image.LANCZOS)
+    if target.suffix == ".jpg":
+        image.convert("RGB").save(target, "JPEG", quality=75, optimize=True, progressive=True)
+    else:
+        image.save(target, "PNG", optimize=True)
+
+
+def main():
+    STATIC_DIR.mkdir(exist_ok=True)
+    for source, (name, max_size) in ASSETS.items():
+        target = STATIC_DIR / name
+        build_asset(source, target, max_size)
+        print(f"{source} ({Path(source).stat().st_size // 1024} KB) → {target} ({target.stat().st_size // 1024} KB)")
+
+
+if __name__ == "__main__":
+    main()
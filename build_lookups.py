@@ -0,0 +1,62 @@
+# === Build Dashboard Lookups ===
+# Usage: python build_lookups.py
+#
+# Writes the dropdown lookups (positionGroup → mainPosition and league levels per
+# area) into one JSON artifact, so the dashboard never has to parse the prediction
+# CSV. The category vocabularies are read from category_mappings.json when the
+# artifact is loaded, so there is no second copy of them to drift.
+import argparse  # Command line interface
+import json  # Read and write JSON files
+import pandas as pd  # Data handling
+from pipeline import CATEGORY_MAPPINGS_PATH, load_category_mappings  # Category vocabularies
+
+PREDICTIONS_PATH = "xgboost_predictions_test.csv"
+LOOKUPS_PATH = "lookups.json"
+
+# League level per area
+AREA_TO_LEVELS = {
+    'Austria': [1, 2], 'Belgium': [1, 2], 'Bosnia-Herzegovina': [1], 'Bulgaria': [1], 'Canada': [1],
+    'Croatia': [1, 2], 'Czech Republic': [1], 'Denmark': [1, 2], 'England': [1, 2, 3, 4], 'Estonia': [1],
+    'Finland': [1, 2], 'France': [1, 2, 3], 'Georgia': [1], 'Germany': [1, 2, 3, 4], 'Greece': [1],
+    'Hungary': [1], 'Ireland': [1], 'Israel': [1], 'Italy': [1, 2], 'Japan': [1], 'Korea, South': [1],
+    'Latvia': [1], 'Lithuania': [1], 'Luxembourg': [1], 'Malta': [1], 'Moldova': [1], 'Montenegro': [1],
+    'Netherlands': [1, 2], 'Northern Ireland': [1], 'Norway': [1, 2], 'Poland': [1], 'Portugal': [1, 2],
+    'Romania': [1], 'Russia': [1], 'Saudi Arabia': [1], 'Scotland': [1], 'Serbia': [1], 'Slovakia': [1],
+    'Slovenia': [1], 'Spain': [1, 2], 'Sweden': [1, 2], 'Switzerland': [1, 2], 'Türkiye': [1],
+    'Ukraine': [1], 'United States': [1, 2, 3], 'Wales': [1]
+}
+
+
+# Collect the dropdown lookups into one dict
+def build_lookups(predictions_path=PREDICTIONS_PATH):
+    predictions = pd.read_csv(predictions_path, usecols=["positionGroup", "mainPosition"])
+    position_group_to_main = predictions.groupby("positionGroup")["mainPosition"].unique().apply(list).to_dict()
+
+    return {
+        "position_group_to_main": position_group_to_main,
+        "area_to_levels": AREA_TO_LEVELS,
+    }
+
+
+# Load the lookup artifact together with the category mappings
+def load_lookups(path=LOOKUPS_PATH, mappings_path=CATEGORY_MAPPINGS_PATH):
+    with open(path, encoding="utf-8") as f:
+        lookups = json.load(f)
+    lookups["category_mappings"] = load_category_mappings(mappings_path)
+    return lookups
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the dashboard lookup artifact.")
+    parser.add_argument("--predictions", default=PREDICTIONS_PATH)
+    parser.add_argument("-o", "--output", default=LOOKUPS_PATH)
+    args = parser.parse_args(argv)
+
+    lookups = build_lookups(args.predictions)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(lookups, f, ensure_ascii=False, separators=(",", ":"))
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# === Candidate Search ===
+# Usage: python candidate_search.py --to-value 61.7 --to-area Germany --to-level 1 [--budget 15] [--position-group midfielder] [--top 10]
+#
+# Ranks the players of the reference data by their predicted playing time at a target
+# club. Every player moves from the club of their latest transfer to the target club, in
+# one vectorized pass: that club and its league become the "from" columns, the playing
+# time there becomes percentage_played_before, a loan becomes wasLoan, the target club
+# fills the "to" columns and the team features derived from them are recomputed. The
+# other inputs (age, market value, scoring and clean-sheet groups) are the latest ones
+# the reference data has, from that transfer. The whole pool is then scored
+# with one XGBoost call and one GAM call. Scored pools are cached per target club
+# profile, so refining the filters (budget, position, age) only filters and sorts.
+import argparse  # Command line interface
+import time  # Search timing
+import numpy as np  # Filter masks
+from prediction_cache import PredictionCache  # Scored pools per target profile
+from pipeline import predict_playing_time  # Prediction chain
+from timing import stage  # Stage latency
+
+DEFAULT_TOP_N = 10
+DEFAULT_PROFILES = 16
+
+# Columns of the candidate pool besides the model features
+CANDIDATE_ID_COLUMNS = ["playerId", "playerName", "season", "percentage_played"]
+
+# Columns returned for each candidate: the player and the current club (the destination of the latest transfer)
+RESULT_COLUMNS = [
+    "playerId", "playerName", "season", "positionGroup", "mainPosition", "transferAge", "marketvalue_closest",
+    "toTeam_marketValue", "to_competition_competition_area", "to_competition_competition_level", "percentage_played",
+]
+
+# Features derived from the "to" columns, recomputed by add_derived_features after the move
+DERIVED_TARGET_COLUMNS = ["team_market_value_relation", "foreign_transfer"]
+
+# Columns of the next transfer taken from the latest one: next column ← latest column
+CURRENT_CLUB_COLUMNS = {
+    "fromTeam_marketValue": "toTeam_marketValue",
+    "from_competition_competition_area": "to_competition_competition_area",
+    "from_competition_competition_level": "to_competition_competition_level",
+    "percentage_played_before": "percentage_played",
+    "wasLoan": "isLoan",
+}
+
+
+# Latest transfer of every player
+def candidate_pool(reference_df):
+    return reference_df.sort_values("season", kind="stable").drop_duplicates("playerId", keep="last").reset_index(drop=True)
+
+
+# Next transfer of every pool player: from the current club to the target club, as a permanent move
+def move_to_target(pool, to_value, to_area, to_level):
+    moved = pool.drop(columns=DERIVED_TARGET_COLUMNS, errors="ignore")
+    for next_col, latest_col in CURRENT_CLUB_COLUMNS.items():
+        moved[next_col] = pool[latest_col]
+    moved["isLoan"] = False
+    moved["toTeam_marketValue"] = float(to_value)
+    moved["to_competition_competition_area"] = to_area
+    moved["to_competition_competition_level"] = to_level
+    return moved
+
+
+# Candidate pool with its models; scored pools are kept per target profile (club value in €, area, level)
+class CandidateSearch:
+    def __init__(self, pool, model, gam_model, builder, max_profiles=DEFAULT_PROFILES):
+        self.pool = pool
+        self.model = model
+        self.gam_model = gam_model
+        self.builder = builder
+        self.scored = PredictionCache(max_profiles)
+
+    # Predicted playing time of every candidate at the target club
+    def score(self, to_value, to_area, to_level):
+        profile = (float(to_value), str(to_area), int(to_level))
+        scored = self.scored.get(profile)
+        if scored is None:
+            with stage("candidate_scoring"):
+                features = self.builder.build(move_to_target(self.pool, *profile))
+                _, final_pred = predict_playing_time(self.model, self.gam_model, features)
+                scored = self.scored.put(profile, self.pool[RESULT_COLUMNS].assign(predicted_playing_time=final_pred))
+        return scored
+
+    # Top candidates for the target club within the filters; budget and market values in €M
+    def search(self, to_value, to_area, to_level, budget=None, position_group=None, main_position=None,
+               max_age=None, top_n=DEFAULT_TOP_N):
+        scored = self.score(to_value, to_area, to_level)
+        with stage("candidate_filter"):
+            mask = np.ones(len(scored), dtype=bool)
+            if budget is not None:
+                mask &= (scored["marketvalue_closest"] <= budget).to_numpy()
+            if position_group is not None:
+                mask &= (scored["positionGroup"] == position_group).to_numpy()
+            if main_position is not None:
+                mask &= (scored["mainPosition"] == main_position).to_numpy()
+            if max_age is not None:
+                mask &= (scored["transferAge"] <= max_age).to_numpy()
+            return scored[mask].nlargest(top_n, "predicted_playing_time")
+
+
+# Search over the latest transfer of every player in the base reference file. Appended
+# transfer windows hold only the similarity columns, not all model features, so they are
+# not part of the pool.
+def load_candidate_search(model, gam_model, builder):
+    from reference_store import load_reference_data  # Reference transfers
+
+    columns = list(dict.fromkeys(builder.feature_names + CANDIDATE_ID_COLUMNS))
+    return CandidateSearch(candidate_pool(load_reference_data(columns)), model, gam_model, builder)
+
+
+def main(argv=None):
+    from features import FeatureBuilder  # Model feature frame
+    from pipeline import load_category_mappings, load_gam_model, load_model  # Models
+
+    parser = argparse.ArgumentParser(description="Rank the reference players by predicted playing time at a target club.")
+    parser.add_argument("--to-value", type=float, required=True, help="target club market value in €M")
+    parser.add_argument("--to-area", required=True)
+    parser.add_argument("--to-level", type=int, default=1)
+    parser.add_argument("--budget", type=float, help="highest player market value in €M")
+    parser.add_argument("--position-group")
+    parser.add_argument("--main-position")
+    parser.add_argument("--max-age", type=float)
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP_N)
+    args = parser.parse_args(argv)
+
+    model = load_model()
+    search = load_candidate_search(model, load_gam_model(), FeatureBuilder(model.feature_names_in_, load_category_mappings()))
+    filters = dict(budget=args.budget, position_group=args.position_group, main_position=args.main_position,
+                   max_age=args.max_age, top_n=args.top)
+
+    start = time.perf_counter()
+    result = search.search(args.to_value * 1_000_000, args.to_area, args.to_level, **filters)
+    scored = time.perf_counter() - start
+    start = time.perf_counter()
+    search.search(args.to_value * 1_000_000, args.to_area, args.to_level, **filters)
+    cached = time.perf_counter() - start
+
+    print(result.to_string(index=False, float_format="{:,.2f}".format))
+    print(f"{len(search.pool)} candidates scored in {scored * 1000:.0f} ms; "
+          f"the same search from the cached pool in {cached * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
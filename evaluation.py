@@ -0,0 +1,118 @@
+# === Backtest Evaluation ===
+# Usage: python evaluation.py [xgboost_predictions_test.csv]
+#
+# Accuracy of the stored test predictions (Actual vs Predicted): MAE, RMSE and bias
+# overall and per group, plus calibration curves (mean actual per predicted bin).
+# Results are cached on disk under the SHA-256 of the predictions file.
+import argparse  # Command line interface
+import hashlib  # File hash
+import json  # Cache files
+import os  # Cache directory
+from io import StringIO  # Cached tables
+import numpy as np  # Error math
+import pandas as pd  # Group aggregations
+from build_lookups import PREDICTIONS_PATH  # Test predictions
+from pipeline import PLAYING_TIME_BANDS, playing_time_bands  # Result card bands
+
+EVALUATION_CACHE_DIR = "evaluation_cache"
+
+# Breakdowns shown in the accuracy tab: column → label
+GROUPINGS = {
+    "positionGroup": "Position group",
+    "to_competition_competition_level": "League level (to)",
+    "from_competition_competition_level": "League level (from)",
+    "to_competition_competition_area": "Area (to)",
+    "from_competition_competition_area": "Area (from)",
+    "band": "Predicted playing-time band",
+}
+
+# Calibration bins over the predicted playing time (%)
+CALIBRATION_BINS = np.arange(0, 101, 10)
+CALIBRATION_LABELS = [f"{low}–{high}%" for low, high in zip(CALIBRATION_BINS[:-1], CALIBRATION_BINS[1:])]
+
+# Bands in the order of the result card
+BAND_ORDER = pd.CategoricalDtype([msg for _, msg, _ in PLAYING_TIME_BANDS], ordered=True)
+
+
+# SHA-256 of a file, read in blocks
+def file_hash(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Count, MAE, RMSE and bias (mean Actual - Predicted) per group, one groupby pass
+def error_table(df, by=None):
+    frame = df.assign(abs_error=df["Residual"].abs(), sq_error=df["Residual"] ** 2)
+    grouped = frame.groupby(by if by else pd.Series("all", index=frame.index, name="all"), observed=True, sort=True)
+    table = grouped.agg(
+        count=("Residual", "size"),
+        mae=("abs_error", "mean"),
+        rmse=("sq_error", "mean"),
+        bias=("Residual", "mean"),
+        mean_actual=("Actual", "mean"),
+        mean_predicted=("Predicted", "mean"),
+    )
+    table["rmse"] = np.sqrt(table["rmse"])
+    return table.reset_index()
+
+
+# Mean predicted and mean actual playing time per predicted bin, optionally per group
+def calibration_table(df, by=None):
+    bins = pd.cut(df["Predicted"].clip(CALIBRATION_BINS[0], CALIBRATION_BINS[-1]), CALIBRATION_BINS,
+                  labels=CALIBRATION_LABELS, include_lowest=True).rename("bin")
+    keys = [df[by], bins] if by else [bins]
+    table = df.groupby(keys, observed=True).agg(
+        count=("Actual", "size"),
+        mean_predicted=("Predicted", "mean"),
+        mean_actual=("Actual", "mean"),
+    ).reset_index()
+    table["bin"] = table["bin"].astype(str)
+    return table
+
+
+# All evaluation tables of a predictions frame
+def evaluate(df):
+    df = df.dropna(subset=["Actual", "Predicted"]).copy()
+    df["Residual"] = df["Actual"] - df["Predicted"]
+    df["band"] = pd.Categorical(playing_time_bands(df["Predicted"]), dtype=BAND_ORDER)
+    return {
+        "overall": error_table(df),
+        "calibration": calibration_table(df),
+        **{f"errors_by_{col}": error_table(df, col) for col in GROUPINGS},
+        **{f"calibration_by_{col}": calibration_table(df, col) for col in GROUPINGS},
+    }
+
+
+# Evaluation tables of a predictions file, computed once per file content and cached as JSON
+def load_evaluation(path=PREDICTIONS_PATH, cache_dir=EVALUATION_CACHE_DIR):
+    cache_path = os.path.join(cache_dir, f"{file_hash(path)}.json")
+    if os.path.exists(cache_path):
+        with open(cache_path, encoding="utf-8") as f:
+            return {name: pd.read_json(StringIO(table), orient="split") for name, table in json.load(f).items()}
+
+    columns = ["Actual", "Predicted"] + [col for col in GROUPINGS if col != "band"]
+    tables = evaluate(pd.read_csv(path, usecols=columns))
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(cache_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({name: table.to_json(orient="split", index=False) for name, table in tables.items()}, f)
+    os.replace(cache_path + ".tmp", cache_path)
+    return tables
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate the stored test predictions.")
+    parser.add_argument("input", nargs="?", default=PREDICTIONS_PATH)
+    args = parser.parse_args(argv)
+
+    tables = load_evaluation(args.input)
+    print(tables["overall"].to_string(index=False))
+    for col in GROUPINGS:
+        print(f"\n{GROUPINGS[col]}")
+        print(tables[f"errors_by_{col}"].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# === Per-Prediction Explanations ===
+#
+# SHAP contributions from XGBoost's native TreeSHAP (pred_contribs), in the units of
+# the XGBoost output: the bias plus the feature contributions add up to xgb_prediction.
+# The GAM metamodel calibrates that sum afterwards.
+from io import BytesIO  # Chart images
+import numpy as np  # Contribution arrays
+import pandas as pd  # Contribution frames
+from timing import stage  # Stage latency
+
+BIAS_COLUMN = "bias"
+CONTRIB_PREFIX = "contrib_"
+
+
+# SHAP contributions for a typed feature frame, one booster call for all rows
+def contributions(model, features):
+    import xgboost as xgb  # DMatrix
+
+    booster = model.get_booster()
+    best_iteration = booster.attributes().get("best_iteration")
+    iteration_range = (0, int(best_iteration) + 1) if best_iteration is not None else (0, 0)
+    with stage("shap_contributions"):
+        values = booster.predict(xgb.DMatrix(features, enable_categorical=True),
+                                 pred_contribs=True, iteration_range=iteration_range)
+    return pd.DataFrame(values, columns=list(features.columns) + [BIAS_COLUMN], index=features.index)
+
+
+# Largest contributions of one row by magnitude, with the rest summed into one bar
+def top_contributions(row, n=10):
+    row = row.drop(BIAS_COLUMN)
+    top = row.reindex(row.abs().sort_values(ascending=False).index[:n])
+    rest = row.drop(top.index).sum()
+    if len(row) > n:
+        top[f"{len(row) - n} other features"] = rest
+    return top
+
+
+# Waterfall chart from the bias (bottom) to the XGBoost prediction (top), largest contributions on top.
+# A plain Figure outside pyplot's global state, so charts can also be drawn in worker threads.
+def waterfall_chart(row, labels=None, n=10):
+    from matplotlib.figure import Figure  # Chart rendering
+
+    top = top_contributions(row, n)[::-1]
+    labels = [labels.get(name, name) if labels else name for name in top.index]
+    ends = row[BIAS_COLUMN] + np.cumsum(top.to_numpy())
+    starts = ends - top.to_numpy()
+
+    fig = Figure(figsize=(8, 0.4 * len(top) + 1.5))
+    ax = fig.subplots()
+    colors = np.where(top.to_numpy() >= 0, "#32CD32", "#FF4B4B")
+    ax.barh(range(len(top)), top.to_numpy(), left=starts, color=colors)
+    for i, (value, end) in enumerate(zip(top.to_numpy(), np.maximum(starts, ends))):
+        ax.text(end, i, f" {value:+.2f}", va="center", fontsize=8)
+    ax.axvline(row[BIAS_COLUMN], color="grey", linestyle="--", linewidth=1)
+    ax.axvline(row.sum(), color="black", linewidth=1)
+    ax.set_yticks(range(len(top)), labels)
+    ax.margins(x=0.12)
+    ax.set_xlabel(f"XGBoost output (base value {row[BIAS_COLUMN]:.2f} → prediction {row.sum():.2f})")
+    fig.tight_layout()
+    return fig
+
+
+# Waterfall chart as PNG bytes, saved with the settings st.pyplot uses
+def waterfall_png(row, labels=None, n=10):
+    buffer = BytesIO()
+    waterfall_chart(row, labels, n).savefig(buffer, format="png", bbox_inches="tight", dpi=200)
+    return buffer.getvalue()
+
+
+# Contribution columns to append to a scored frame
+def contribution_columns(model, features):
+    return contributions(model, features).add_prefix(CONTRIB_PREFIX)
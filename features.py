@@ -0,0 +1,96 @@
+# === Model Feature Frame ===
+import numpy as np  # Array math
+import pandas as pd  # Data handling
+
+# Display labels for the grouped "other" categories
+LABEL_MAPPING = {
+    "other": {
+        "scorer_before_grouped_category": "20+",
+        "clean_sheets_before_grouped": "15+"
+    }
+}
+
+# Display labels → model categories
+REVERSE_MAPPING = {
+    "20+": "15-20",
+    "15+": "10-15"
+}
+
+# Columns whose values may arrive as display labels
+LABELLED_COLUMNS = list(LABEL_MAPPING["other"])
+
+
+# Display labels for the options of a grouped column
+def display_labels(col, values):
+    return [LABEL_MAPPING["other"][col] if v == "other" else v for v in values]
+
+
+# Features add_derived_features computes when the raw transfers do not provide them
+DERIVED_FEATURES = ["value_per_age", "value_age_product", "team_market_value_relation", "foreign_transfer"]
+
+
+# Fill derived features that the raw transfers do not provide
+def add_derived_features(df):
+    df = df.copy()
+    age = pd.to_numeric(df["transferAge"], errors="coerce").to_numpy(dtype=float)
+    value = pd.to_numeric(df["marketvalue_closest"], errors="coerce").to_numpy(dtype=float)
+    from_value = pd.to_numeric(df["fromTeam_marketValue"], errors="coerce").to_numpy(dtype=float)
+    to_value = pd.to_numeric(df["toTeam_marketValue"], errors="coerce").to_numpy(dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        derived = {
+            "value_per_age": np.where(age > 0, value / age, 0.0),
+            "value_age_product": age * value,
+            "team_market_value_relation": np.where(from_value > 0, to_value / from_value, 0.0),
+            "foreign_transfer": (df["from_competition_competition_area"] != df["to_competition_competition_area"]).to_numpy(dtype=int),
+        }
+    for col, values in derived.items():
+        values = pd.Series(values, index=df.index)
+        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(values) if col in df.columns else values
+    return df
+
+
+# Builds the typed model matrix for N raw transfers in one vectorized pass.
+# Categorical dtypes are built once from category_mappings.json and reused for every call.
+class FeatureBuilder:
+    def __init__(self, feature_names, category_mappings):
+        self.feature_names = list(feature_names)
+        self.dtypes = {
+            col: pd.CategoricalDtype(categories)
+            for col, categories in category_mappings.items()
+            if col in self.feature_names
+        }
+        # string form of each category, e.g. "False" for the boolean category False
+        self.string_codes = {
+            col: {str(c): i for i, c in enumerate(dtype.categories)}
+            for col, dtype in self.dtypes.items()
+        }
+        self.other_codes = {
+            col: dtype.categories.get_loc("other") if "other" in dtype.categories else -1
+            for col, dtype in self.dtypes.items()
+        }
+
+    # Cast one column to its categories; unknown values fall back to "other"
+    def _categorical(self, col, series):
+        if col in LABELLED_COLUMNS:
+            series = series.replace(REVERSE_MAPPING)
+        dtype = self.dtypes[col]
+        codes = dtype.categories.get_indexer(series)
+        unmatched = (codes == -1) & series.notna().to_numpy()
+        if unmatched.any():
+            codes[unmatched] = series[unmatched].astype(str).map(self.string_codes[col]).fillna(self.other_codes[col]).to_numpy(dtype=int)
+        return pd.Categorical.from_codes(codes, dtype=dtype)
+
+    def build(self, raw):
+        df = add_derived_features(raw)
+        columns = {}
+        for col in self.feature_names:
+            if col not in df.columns:
+                columns[col] = np.zeros(len(df))
+            elif col in self.dtypes:
+                columns[col] = self._categorical(col, df[col])
+            elif df[col].dtype == bool:
+                columns[col] = df[col].to_numpy(dtype=int)
+            else:
+                columns[col] = pd.to_numeric(df[col], errors="coerce").to_numpy()
+        return pd.DataFrame(columns, index=df.index)
@@ -0,0 +1,51 @@
+# === GAM Lookup Table ===
+#
+# The GAM metamodel is a smooth function of the XGBoost prediction alone, so it is
+# tabulated once on a dense grid and evaluated with np.interp. Inputs outside the
+# table range are passed to the GAM itself.
+import numpy as np  # Interpolation
+
+DEFAULT_TOLERANCE = 1e-3
+DEFAULT_POINTS = 1025
+MAX_POINTS = 2 ** 20
+
+
+# Interpolation table of a one-feature GAM with a validated maximum error
+class GamTable:
+    def __init__(self, gam_model, low=None, high=None, tolerance=DEFAULT_TOLERANCE, points=DEFAULT_POINTS):
+        edge_low, edge_high = (float(v) for v in gam_model.edge_knots_[0])
+        self.gam_model = gam_model
+        self.low = edge_low if low is None else min(low, edge_low)
+        self.high = edge_high if high is None else max(high, edge_high)
+        self.tolerance = tolerance
+
+        # refine the grid until the error between grid points is within the tolerance
+        while True:
+            self.grid = np.linspace(self.low, self.high, points)
+            self.values = gam_model.predict(self.grid.reshape(-1, 1))
+            self.max_error = self.validate()
+            if self.max_error <= tolerance or points >= MAX_POINTS:
+                break
+            points = 2 * points - 1
+
+    # Largest difference to the GAM at the grid midpoints and at random points, where interpolation error peaks
+    def validate(self, n=10_000, seed=0):
+        midpoints = (self.grid[:-1] + self.grid[1:]) / 2
+        random = np.random.default_rng(seed).uniform(self.low, self.high, n)
+        x = np.concatenate([midpoints, random])
+        return float(np.max(np.abs(np.interp(x, self.grid, self.values) - self.gam_model.predict(x.reshape(-1, 1)))))
+
+    # Same interface as gam_model.predict for an (n, 1) array
+    def predict(self, X):
+        x = np.asarray(X, dtype=np.float64).reshape(-1)
+        result = np.interp(x, self.grid, self.values)
+        outside = (x < self.low) | (x > self.high) | np.isnan(x)
+        if outside.any():
+            result[outside] = self.gam_model.predict(x[outside].reshape(-1, 1))
+        return result
+
+
+# Lookup table when it stays within the tolerance, else None
+def compile_gam(gam_model, low=None, high=None, tolerance=DEFAULT_TOLERANCE):
+    table = GamTable(gam_model, low, high, tolerance)
+    return table if table.max_error <= tolerance else None
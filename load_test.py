@@ -0,0 +1,90 @@
+# === Load Test for the Prediction API ===
+# Usage: python load_test.py [--url http://127.0.0.1:8502/predict] [--concurrency 1 8 32] [--duration 10]
+#
+# Replays single-transfer requests from xgboost_predictions_test.csv against a
+# running prediction_service.py and reports throughput and latency percentiles.
+import argparse  # Command line interface
+import json  # Request bodies
+import threading  # Concurrent clients
+import time  # Latency measurement
+import urllib.request  # HTTP client
+import numpy as np  # Percentiles
+import pandas as pd  # Sample transfers
+
+SAMPLE_PATH = "xgboost_predictions_test.csv"
+DROP_COLUMNS = ["Actual", "Predicted", "Residual"]
+
+
+# Transfers from the test CSV as JSON request bodies
+def load_payloads(path=SAMPLE_PATH, n=1000):
+    sample = pd.read_csv(path, nrows=n).drop(columns=DROP_COLUMNS, errors="ignore")
+    records = json.loads(sample.to_json(orient="records"))
+    return [json.dumps(record).encode() for record in records]
+
+
+# Run clients against the API for a fixed duration
+def run_load(url, payloads, concurrency, duration):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client(offset):
+        i = offset
+        local, failed = [], 0
+        while time.perf_counter() < stop_at:
+            request = urllib.request.Request(url, data=payloads[i % len(payloads)], headers={"Content-Type": "application/json"})
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request) as response:
+                    response.read()
+                local.append(time.perf_counter() - start)
+            except OSError:
+                failed += 1
+            i += concurrency
+        with lock:
+            latencies.extend(local)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": sum(errors),
+        "requests_per_s": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(latencies_ms, 50)) if len(latencies_ms) else None,
+        "p95_ms": float(np.percentile(latencies_ms, 95)) if len(latencies_ms) else None,
+        "p99_ms": float(np.percentile(latencies_ms, 99)) if len(latencies_ms) else None,
+    }
+
+
+def _format_ms(value):
+    return f"{value:8.1f}" if value is not None else f"{'-':>8}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the prediction API.")
+    parser.add_argument("--url", default="http://127.0.0.1:8502/predict")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per concurrency level")
+    parser.add_argument("--sample", default=SAMPLE_PATH)
+    args = parser.parse_args(argv)
+
+    payloads = load_payloads(args.sample)
+    print(f"{'clients':>8} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for concurrency in args.concurrency:
+        r = run_load(args.url, payloads, concurrency, args.duration)
+        print(f"{r['concurrency']:>8} {r['requests']:>9} {r['errors']:>7} {r['requests_per_s']:>9.1f} "
+              f"{_format_ms(r['p50_ms'])} {_format_ms(r['p95_ms'])} {_format_ms(r['p99_ms'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# === Prediction Pipeline: XGBoost model → GAM metamodel ===
+import json  # Read JSON files
+import os  # File metadata
+import numpy as np  # Array math
+from timing import stage  # Stage latency
+
+# Model, mapping and reference data files
+MODEL_PATH = "model2.json"
+GAM_MODEL_PATH = "gam_model.pkl"
+CATEGORY_MAPPINGS_PATH = "category_mappings.json"
+REFERENCE_PATH = "df.csv"
+
+# Playing-time bands of the result card: (upper bound in %, message, color)
+PLAYING_TIME_BANDS = [
+    (20, "Not expected to play", "#FF4B4B"),
+    (40, "Expected to Be a Substitute", "#FFA500"),
+    (60, "Expected to Be a Rotation Player", "#32CD32"),
+    (90, "Expected to Be a Key Player", "#008000"),
+    (np.inf, "Next Starplayer", "#015801"),
+]
+_band_bounds = np.array([upper for upper, _, _ in PLAYING_TIME_BANDS[:-1]])
+_band_messages = np.array([msg for _, msg, _ in PLAYING_TIME_BANDS], dtype=object)
+
+
+# Modification time and size of a file, used to detect replaced model files
+def file_fingerprint(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+# Load XGBoost model; xgboost and pygam are imported on first load, not with this module
+def load_model(path=MODEL_PATH):
+    import xgboost as xgb  # XGBoost model
+
+    model = xgb.XGBRegressor()
+    model.load_model(path)
+    return model
+
+
+# Load GAM metamodel
+def load_gam_model(path=GAM_MODEL_PATH):
+    import joblib  # Load serialized models
+
+    return joblib.load(path)
+
+
+# Feature names stored in the XGBoost model file, read without loading xgboost
+def model_feature_names(path=MODEL_PATH):
+    with open(path) as f:
+        return json.load(f)["learner"]["feature_names"]
+
+
+# Load category mappings
+def load_category_mappings(path=CATEGORY_MAPPINGS_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+
+# XGBoost prediction calibrated by the GAM metamodel
+def predict_playing_time(model, gam_model, features):
+    with stage("xgboost_predict"):
+        xgb_pred = model.predict(features)
+    with stage("gam_predict"):
+        final_pred = gam_model.predict(xgb_pred.reshape(-1, 1))
+    return xgb_pred, final_pred
+
+
+# Message and color for a single predicted playing time
+def playing_time_band(value):
+    for upper, msg, color in PLAYING_TIME_BANDS:
+        if value < upper:
+            return msg, color
+    return PLAYING_TIME_BANDS[-1][1:]
+
+
+# Band messages for an array of predicted playing times
+def playing_time_bands(values):
+    return _band_messages[np.searchsorted(_band_bounds, np.asarray(values, dtype=float), side="right")]
@@ -0,0 +1,59 @@
+# === Prediction Cache ===
+import hashlib  # Canonical input hash
+import json  # Canonical serialization
+import threading  # Shared across sessions
+from collections import OrderedDict  # LRU order
+import numpy as np  # Numeric normalization
+
+DEFAULT_MAXSIZE = 512
+
+
+# Canonical form of one feature value: numbers as floats, everything else as text
+def _normalize(value):
+    if isinstance(value, (bool, np.bool_, int, float, np.integer, np.floating)):
+        return float(value)
+    return str(value)
+
+
+# Hash of a one-row model matrix plus the versions of everything that produced the result
+def prediction_key(input_df, versions):
+    row = input_df.iloc[0]
+    payload = [[col, _normalize(row[col])] for col in input_df.columns]
+    payload.append(["versions", [str(v) for v in versions]])
+    return hashlib.sha256(json.dumps(payload).encode()).hexdigest()
+
+
+# Thread-safe LRU cache with hit and miss counters
+class PredictionCache:
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return None
+
+    # Membership test that leaves the LRU order and the counters alone
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.entries
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return value
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self.entries), "maxsize": self.maxsize}
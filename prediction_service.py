@@ -0,0 +1,220 @@
+# === Local Prediction API ===
+# Usage: python prediction_service.py [--port 8502] [--max-wait-ms 5] [--max-batch 256]
+#
+# POST /predict with one transfer (JSON object) or a list of transfers, using the
+# column names of xgboost_predictions_test.csv. Every model feature except the derived
+# ones must be present; null marks a missing value, which XGBoost handles as in
+# training. Invalid records are rejected with 400 before they are queued. Requests
+# arriving within --max-wait-ms of each other are scored together in one model call.
+# GET /metrics exposes the stage latencies in Prometheus text format.
+import argparse  # Command line interface
+import json  # Request and response bodies
+import queue  # Pending requests
+import threading  # Batching worker
+import time  # Batching window
+from concurrent.futures import Future  # Per-request results
+from http.server import ThreadingHTTPServer  # HTTP server
+import pandas as pd  # Data handling
+from timing import MetricsHandler, stage  # Stage latency and GET /metrics
+from features import DERIVED_FEATURES, FeatureBuilder  # Model feature frame
+from pipeline import (  # Models and prediction chain
+    MODEL_PATH, GAM_MODEL_PATH, CATEGORY_MAPPINGS_PATH,
+    load_model, load_gam_model, load_category_mappings,
+    predict_playing_time, playing_time_bands,
+)
+
+DEFAULT_PORT = 8502
+DEFAULT_MAX_WAIT_MS = 5
+DEFAULT_MAX_BATCH = 256
+
+
+# Records rejected before they are queued; details maps record positions to their problems
+class InvalidTransfer(ValueError):
+    def __init__(self, details):
+        super().__init__(f"invalid transfer: {details}")
+        self.details = details
+
+
+# Groups concurrent requests into one XGBoost → GAM call
+class MicroBatcher:
+    def __init__(self, model, gam_model, category_mappings, max_wait_ms=DEFAULT_MAX_WAIT_MS, max_batch=DEFAULT_MAX_BATCH):
+        self.model = model
+        self.gam_model = gam_model
+        self.builder = FeatureBuilder(model.feature_names_in_, category_mappings)
+        self.required = [col for col in self.builder.feature_names if col not in DERIVED_FEATURES]
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch = max_batch
+        self.pending = queue.Queue()
+        self.batches = 0
+        self.rows = 0
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    # Problems of one record: missing input columns, non-numeric values in numeric columns
+    def validate(self, record):
+        errors = [f"missing column '{col}'" for col in self.required if col not in record]
+        for col in self.builder.feature_names:
+            value = record.get(col)
+            if value is None:
+                continue
+            if col in self.builder.dtypes:
+                if not isinstance(value, (str, int, float)):
+                    errors.append(f"'{col}' must be a string or a number")
+            elif not isinstance(value, (int, float)):
+                errors.append(f"'{col}' must be a number or null")
+        return errors
+
+    # Queue records for scoring; the future resolves to one result dict per record.
+    # Raises InvalidTransfer without queueing anything when a record is invalid.
+    def submit(self, records):
+        errors = {i: problems for i, record in enumerate(records) if (problems := self.validate(record))}
+        if errors:
+            raise InvalidTransfer(errors)
+        future = Future()
+        self.pending.put((records, future))
+        return future
+
+    # Collect requests until the batching window closes or the batch is full
+    def _collect(self):
+        batch = [self.pending.get()]
+        size = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self.pending.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    # Result dicts for a list of records, scored with one model call
+    def _score(self, records):
+        raw = pd.DataFrame(records)
+        with stage("feature_frame"):
+            features = self.builder.build(raw)
+        xgb_pred, final_pred = predict_playing_time(self.model, self.gam_model, features)
+        bands = playing_time_bands(final_pred)
+        self.batches += 1
+        self.rows += len(raw)
+        return [
+            {
+                "xgb_prediction": float(xgb_pred[i]),
+                "predicted_playing_time": float(final_pred[i]),
+                "playing_time_band": bands[i],
+            }
+            for i in range(len(records))
+        ]
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                results = self._score([record for records, _ in batch for record in records])
+            except Exception:
+                # score every request on its own, so one bad request only fails itself
+                for records, future in batch:
+                    try:
+                        future.set_result(self._score(records))
+                    except Exception as exc:
+                        future.set_exception(exc)
+                continue
+
+            offset = 0
+            for records, future in batch:
+                future.set_result(results[offset:offset + len(records)])
+                offset += len(records)
+
+
+# HTTP handler; the batcher is attached to the server, /metrics is served by timing's handler
+class PredictionHandler(MetricsHandler):
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            self.send_metrics()
+            return
+        if self.path != "/health":
+            self._send_json(404, {"error": "not found"})
+            return
+        batcher = self.server.batcher
+        self._send_json(200, {"status": "ok", "batches": batcher.batches, "rows": batcher.rows})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        except json.JSONDecodeError as exc:
+            self._send_json(400, {"error": f"invalid JSON: {exc}"})
+            return
+
+        single = isinstance(payload, dict)
+        records = [payload] if single else payload
+        if not isinstance(records, list) or not records or not all(isinstance(r, dict) for r in records):
+            self._send_json(400, {"error": "expected a transfer object or a non-empty list of transfer objects"})
+            return
+
+        try:
+            future = self.server.batcher.submit(records)
+        except InvalidTransfer as exc:
+            self._send_json(400, {"error": "invalid transfer", "details": exc.details[0] if single else exc.details})
+            return
+        try:
+            results = future.result()
+        except Exception as exc:
+            self._send_json(500, {"error": str(exc)})
+            return
+        self._send_json(200, results[0] if single else {"predictions": results})
+
+
+# Threaded HTTP server with a listen backlog sized for concurrent clients
+class PredictionServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+# Build the HTTP server around a micro-batcher
+def create_server(host, port, batcher):
+    server = PredictionServer((host, port), PredictionHandler)
+    server.batcher = batcher
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve transfer predictions over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS, help="batching window")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH, help="maximum rows per model call")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--gam-model", default=GAM_MODEL_PATH)
+    parser.add_argument("--mappings", default=CATEGORY_MAPPINGS_PATH)
+    args = parser.parse_args(argv)
+
+    batcher = MicroBatcher(
+        load_model(args.model), load_gam_model(args.gam_model), load_category_mappings(args.mappings),
+        args.max_wait_ms, args.max_batch,
+    )
+    server = create_server(args.host, args.port, batcher)
+    print(f"Serving predictions on http://{args.host}:{args.port}/predict")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+# === Incremental Reference Refresh ===
+# Usage: python reference_refresh.py new_transfers.csv [--updates-dir reference_updates]
+#
+# New transfer windows are appended as immutable Parquet files next to the base
+# reference data. A running dashboard picks them up on its next rerun, applies
+# them in a background thread (only the similarity partitions that receive rows
+# are rebuilt) and swaps the new snapshot in with one assignment, so sessions
+# never see a half-updated reference. Every snapshot is published through
+# shared_reference.py, so all processes on the host map the same arrays.
+import argparse  # Command line interface
+import os  # Update files
+import threading  # Background refresh
+import time  # File names and timing
+from dataclasses import dataclass  # Snapshot record
+import pandas as pd  # Data handling
+from reference_store import REFERENCE_COLUMNS, load_reference_data, optimize_dtypes, reference_data_path  # Reference transfers
+from pipeline import file_fingerprint  # Base file version
+from shared_reference import SHARED_REFERENCE_DIR, load_shared_snapshot, share_snapshot  # Memory-mapped snapshots
+from similarity import SimilarityIndex  # Similar transfer search
+from timing import stage  # Stage latency
+
+REFERENCE_UPDATES_DIR = "reference_updates"
+
+
+# Reference data and similarity index of one refresh
+@dataclass(frozen=True)
+class ReferenceSnapshot:
+    reference_df: pd.DataFrame
+    similarity_index: SimilarityIndex
+    applied: tuple = ()
+    base_version: tuple = ()
+
+    # Identifies the data behind a prediction, for cache keys
+    @property
+    def version(self):
+        return (self.base_version, self.applied)
+
+
+# Append new transfer rows as one update file; written under a temporary name and renamed atomically
+def append_reference_rows(rows, updates_dir=REFERENCE_UPDATES_DIR):
+    missing = [col for col in REFERENCE_COLUMNS if col not in rows.columns]
+    if missing:
+        raise ValueError(f"new reference rows are missing columns: {missing}")
+    os.makedirs(updates_dir, exist_ok=True)
+    path = os.path.join(updates_dir, f"{time.time_ns()}.parquet")
+    optimize_dtypes(rows[REFERENCE_COLUMNS]).to_parquet(path + ".tmp", index=False)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+# Update files in the order they were appended
+def update_files(updates_dir=REFERENCE_UPDATES_DIR):
+    if not os.path.isdir(updates_dir):
+        return []
+    return sorted(os.path.join(updates_dir, name) for name in os.listdir(updates_dir) if name.endswith(".parquet"))
+
+
+# Version of the reference data on disk: base file fingerprint and update file names
+def data_version(updates_dir=REFERENCE_UPDATES_DIR):
+    return file_fingerprint(reference_data_path()), tuple(os.path.basename(path) for path in update_files(updates_dir))
+
+
+# Position groups and league levels found in new rows, added to the vocabulary of earlier updates
+def vocabulary_additions(vocabulary, rows):
+    position_group_to_main = {group: list(mains) for group, mains in vocabulary["position_group_to_main"].items()}
+    for group, main in rows[["positionGroup", "mainPosition"]].drop_duplicates().astype(str).itertuples(index=False):
+        mains = position_group_to_main.setdefault(group, [])
+        if main not in mains:
+            mains.append(main)
+
+    area_to_levels = {area: list(levels) for area, levels in vocabulary["area_to_levels"].items()}
+    for side in ("from", "to"):
+        pairs = rows[[f"{side}_competition_competition_area", f"{side}_competition_competition_level"]].dropna().drop_duplicates()
+        for area, level in pairs.itertuples(index=False):
+            levels = area_to_levels.setdefault(str(area), [])
+            if int(level) not in levels:
+                levels.append(int(level))
+                levels.sort()
+    return {"position_group_to_main": position_group_to_main, "area_to_levels": area_to_levels}
+
+
+# Vocabulary additions of the given update files, read without building a snapshot
+def update_vocabulary(paths):
+    vocabulary = {"position_group_to_main": {}, "area_to_levels": {}}
+    columns = ["positionGroup", "mainPosition"] + [f"{side}_competition_competition_{part}" for side in ("from", "to") for part in ("area", "level")]
+    for path in paths:
+        vocabulary = vocabulary_additions(vocabulary, pd.read_parquet(path, columns=columns))
+    return vocabulary
+
+
+# Dropdown lookups with the additions from appended rows. Values outside the model's
+# category mappings are left out: the trained model has no codes for them.
+def merge_vocabulary(lookups, vocabulary):
+    category_mappings = lookups["category_mappings"]
+    known_groups, known_positions = set(category_mappings["positionGroup"]), set(category_mappings["mainPosition"])
+    known_areas = set(category_mappings["from_competition_competition_area"]) | set(category_mappings["to_competition_competition_area"])
+
+    position_group_to_main = {group: list(mains) for group, mains in lookups["position_group_to_main"].items()}
+    for group, mains in vocabulary["position_group_to_main"].items():
+        if group in known_groups:
+            existing = position_group_to_main.setdefault(group, [])
+            existing.extend(m for m in mains if m in known_positions and m not in existing)
+    area_to_levels = {area: list(levels) for area, levels in lookups["area_to_levels"].items()}
+    for area, levels in vocabulary["area_to_levels"].items():
+        if area in known_areas:
+            area_to_levels[area] = sorted(set(area_to_levels.get(area, [])) | set(levels))
+    return {**lookups, "position_group_to_main": position_group_to_main, "area_to_levels": area_to_levels}
+
+
+# Current reference snapshot of the process, refreshed in the background when update files appear.
+# A snapshot another process already published is mapped instead of rebuilt; shared_dir=None
+# keeps the snapshots in process memory.
+class ReferenceState:
+    def __init__(self, reference_df=None, updates_dir=REFERENCE_UPDATES_DIR, shared_dir=SHARED_REFERENCE_DIR):
+        self.updates_dir = updates_dir
+        self.shared_dir = shared_dir
+        self.lock = threading.Lock()
+        self.refresh_thread = None
+        self.failed = set()
+        self.last_error = None
+        version = data_version(updates_dir)
+        base_version, paths = version[0], [os.path.join(updates_dir, name) for name in version[1]]
+        self.snapshot = load_shared_snapshot(version, shared_dir) if shared_dir else None
+        if self.snapshot is None:
+            if reference_df is None:
+                reference_df = load_reference_data()
+            base = ReferenceSnapshot(reference_df, SimilarityIndex(reference_df), base_version=base_version)
+            self.snapshot = self.share(self.apply(base, paths))
+
+    # Memory-mapped copy of a snapshot; when it cannot be published the snapshot stays in process memory
+    def share(self, snapshot):
+        if not self.shared_dir:
+            return snapshot
+        try:
+            return share_snapshot(snapshot, self.shared_dir)
+        except OSError:
+            return snapshot
+
+    # New snapshot with the given update files applied on top of an existing one
+    def apply(self, snapshot, paths):
+        if not paths:
+            return snapshot
+        with stage("reference_refresh"):
+            rows = pd.concat([pd.read_parquet(path) for path in paths], ignore_index=True)
+            return ReferenceSnapshot(
+                reference_df=optimize_dtypes(pd.concat([snapshot.reference_df, rows], ignore_index=True)),
+                similarity_index=snapshot.similarity_index.append(rows),
+                applied=snapshot.applied + tuple(os.path.basename(path) for path in paths),
+                base_version=snapshot.base_version,
+            )
+
+    # Update files not yet applied to the current snapshot (files that failed once are skipped)
+    def pending(self):
+        applied = set(self.snapshot.applied)
+        return [path for path in update_files(self.updates_dir) if os.path.basename(path) not in applied and path not in self.failed]
+
+    # Start a background refresh when new update files exist; returns True when one was started
+    def poll(self):
+        with self.lock:
+            if self.refresh_thread is not None and self.refresh_thread.is_alive():
+                return False
+            paths = self.pending()
+            if not paths:
+                return False
+            self.refresh_thread = threading.Thread(target=self._refresh, args=(paths,), daemon=True)
+            self.refresh_thread.start()
+            return True
+
+    def _refresh(self, paths):
+        try:
+            self.snapshot = self.share(self.apply(self.snapshot, paths))
+            self.last_error = None
+        except Exception as exc:  # keep serving the previous snapshot
+            self.failed.update(paths)
+            self.last_error = exc
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Append new transfers to the dashboard's reference data.")
+    parser.add_argument("input", help="CSV or Parquet file with the reference columns")
+    parser.add_argument("--updates-dir", default=REFERENCE_UPDATES_DIR)
+    args = parser.parse_args(argv)
+
+    rows = pd.read_parquet(args.input) if args.input.endswith(".parquet") else pd.read_csv(args.input)
+    path = append_reference_rows(rows, args.updates_dir)
+    print(f"Appended {len(rows)} rows as {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# === Columnar Reference Dataset ===
+# Usage: python reference_store.py [df.csv] [-o df.parquet]
+#
+# Converts the reference transfers to Parquet with dictionary-encoded text
+# columns and losslessly downcast numbers. The dashboard then reads only the
+# columns needed for the similarity search and the result display.
+import argparse  # Command line interface
+import os  # File checks
+import time  # Conversion timing
+import numpy as np  # Numeric checks
+import pandas as pd  # Data handling
+from pipeline import REFERENCE_PATH  # Reference CSV
+from similarity import ID_COLUMNS, SIMILARITY_FEATURES  # Columns used by the search
+
+REFERENCE_PARQUET_PATH = "df.parquet"
+
+# Columns loaded for the similarity search and the similar-transfer display
+REFERENCE_COLUMNS = list(dict.fromkeys(SIMILARITY_FEATURES + ID_COLUMNS))
+
+
+# Dictionary-encode text columns and downcast numbers where no value changes
+def optimize_dtypes(df):
+    df = df.copy()
+    for col in df.columns:
+        series = df[col]
+        if series.dtype == object:
+            df[col] = series.astype("category")
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            df[col] = pd.to_numeric(series, downcast="integer")
+        elif pd.api.types.is_float_dtype(series.dtype):
+            values = series.to_numpy()
+            if series.notna().all() and np.array_equal(values, np.round(values)) and np.abs(values).max(initial=0) < 2 ** 62:
+                df[col] = pd.to_numeric(series.astype(np.int64), downcast="integer")
+            elif np.array_equal(values.astype(np.float32).astype(values.dtype), values, equal_nan=True):
+                df[col] = series.astype(np.float32)
+    return df
+
+
+# Write the reference CSV as Parquet
+def convert_reference_csv(csv_path=REFERENCE_PATH, parquet_path=REFERENCE_PARQUET_PATH):
+    df = optimize_dtypes(pd.read_csv(csv_path))
+    df.to_parquet(parquet_path, index=False)
+    return df
+
+
+# File the dashboard reads the reference data from: Parquet when built, else the CSV
+def reference_data_path():
+    return REFERENCE_PARQUET_PATH if os.path.exists(REFERENCE_PARQUET_PATH) else REFERENCE_PATH
+
+
+# Load only the needed reference columns
+def load_reference_data(columns=REFERENCE_COLUMNS):
+    path = reference_data_path()
+    if path == REFERENCE_PARQUET_PATH:
+        return pd.read_parquet(path, columns=columns)
+    return optimize_dtypes(pd.read_csv(path, usecols=columns))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert the reference transfers to Parquet.")
+    parser.add_argument("input", nargs="?", default=REFERENCE_PATH)
+    parser.add_argument("-o", "--output", default=REFERENCE_PARQUET_PATH)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    df = convert_reference_csv(args.input, args.output)
+    print(f"Wrote {args.output}: {len(df)} rows, {len(df.columns)} columns "
+          f"({os.path.getsize(args.input) // 1024} KB CSV → {os.path.getsize(args.output) // 1024} KB Parquet) "
+          f"in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
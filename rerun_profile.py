@@ -0,0 +1,168 @@
+# === Rerun Profile of the Dashboard ===
+# Usage: python rerun_profile.py [--compare <git ref>] [--sessions 5] [--port 8599]
+#
+# Starts the dashboard with `streamlit run` and drives it over its websocket the way
+# a browser does: the first render, a slider move in the input cards and a Predict
+# click. For every interaction it reports the rerun time (request sent until the
+# script or fragment run finished) and the bytes of ForwardMsgs the server sent.
+# With --compare, an earlier commit (exported with git archive) is profiled as well.
+import argparse  # Command line interface
+import asyncio  # Websocket client
+import os  # Paths, environment
+import subprocess  # Streamlit server
+import sys  # Interpreter path
+import tempfile  # Exported commit
+import time  # Rerun timing
+import urllib.request  # Health check
+import numpy as np  # Medians
+from startup_profile import APP_PATH, export_commit  # App file, exported baseline commit
+
+INTERACTIONS = ("first render", "slider move", "predict click")
+SLIDER_KEY = "height"
+PREDICT_LABEL = "🔮 Predict"
+
+
+# One browser session: sends reruns with widget states and counts the messages that come back
+class DashboardSession:
+    def __init__(self, connection):
+        self.connection = connection
+        self.widgets = {}
+        self.states = {}
+        self.cached_hashes = set()
+        self.page_script_hash = ""
+
+    # Rerun the script (or the fragment holding the changed widget); returns seconds and bytes received
+    async def rerun(self, states=(), fragment_id=""):
+        from streamlit.proto.BackMsg_pb2 import BackMsg  # Client requests
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg  # Server messages
+
+        message = BackMsg()
+        client_state = message.rerun_script
+        client_state.page_script_hash = self.page_script_hash
+        client_state.fragment_id = fragment_id
+        client_state.cached_message_hashes.extend(sorted(self.cached_hashes))
+        for state in {**self.states, **{state.id: state for state in states}}.values():
+            client_state.widget_states.widgets.append(state)
+
+        start = time.perf_counter()
+        await self.connection.send(message.SerializeToString())
+        received = 0
+        finished = None
+        while True:
+            timeout = None if finished is None else 0.2
+            try:
+                data = await asyncio.wait_for(self.connection.recv(), timeout)
+            except asyncio.TimeoutError:
+                break
+            received += len(data)
+            msg = ForwardMsg.FromString(data)
+            self._record(msg)
+            if msg.WhichOneof("type") == "script_finished":
+                finished = time.perf_counter() - start
+        return finished, received
+
+    # Widget ids and fragments from new elements, hashes of messages the browser would cache
+    def _record(self, msg):
+        kind = msg.WhichOneof("type")
+        if kind == "new_session":
+            self.page_script_hash = msg.new_session.page_script_hash
+        if msg.metadata.cacheable:
+            self.cached_hashes.add(msg.hash)
+        if kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+            element = msg.delta.new_element
+            proto = getattr(element, element.WhichOneof("type"))
+            widget_id = getattr(proto, "id", "")
+            if widget_id:
+                self.widgets[widget_id] = (proto, msg.delta.fragment_id)
+
+    def find(self, key=None, label=None):
+        for widget_id, (proto, fragment_id) in self.widgets.items():
+            if (key and widget_id.endswith(f"-{key}")) or (label and getattr(proto, "label", None) == label):
+                return widget_id, fragment_id
+        raise KeyError(key or label)
+
+    async def move_slider(self, key, value):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState  # Widget values
+
+        widget_id, fragment_id = self.find(key=key)
+        state = WidgetState(id=widget_id)
+        state.double_array_value.data.append(value)
+        self.states[widget_id] = state
+        return await self.rerun(fragment_id=fragment_id)
+
+    async def click(self, label):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState  # Widget values
+
+        widget_id, fragment_id = self.find(label=label)
+        return await self.rerun([WidgetState(id=widget_id, trigger_value=True)], fragment_id)
+
+
+# First render, slider move and Predict click in a fresh session
+async def profile_session(url, slider_value):
+    from websockets.asyncio.client import connect  # Websocket client, installed with streamlit
+
+    async with connect(url, max_size=None) as connection:
+        session = DashboardSession(connection)
+        return [
+            await session.rerun(),
+            await session.move_slider(SLIDER_KEY, slider_value),
+            await session.click(PREDICT_LABEL),
+        ]
+
+
+# Serve the app in app_dir and profile it; the first session warms the caches and is not counted
+def profile_app(app_dir, sessions, port):
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP_PATH, "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        cwd=app_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        for _ in range(600):
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health")
+                break
+            except OSError:
+                time.sleep(0.1)
+        url = f"ws://127.0.0.1:{port}/_stcore/stream"
+        # a different slider value per session, so every Predict computes a new prediction
+        runs = [asyncio.run(profile_session(url, 170 + i)) for i in range(sessions + 1)][1:]
+    finally:
+        server.terminate()
+        server.wait()
+    return {
+        name: {"seconds": float(np.median([run[i][0] for run in runs])), "bytes": int(np.median([run[i][1] for run in runs]))}
+        for i, name in enumerate(INTERACTIONS)
+    }
+
+
+def print_profile(label, profile):
+    print(label)
+    for name, result in profile.items():
+        print(f"    {name:<16} {result['seconds'] * 1000:>8.1f} ms {result['bytes'] / 1024:>9.1f} KB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile the dashboard's reruns per interaction.")
+    parser.add_argument("--compare", help="git ref to profile as the baseline, e.g. HEAD~1")
+    parser.add_argument("--sessions", type=int, default=5, help="measured sessions per app (medians are reported)")
+    parser.add_argument("--port", type=int, default=8599)
+    args = parser.parse_args(argv)
+
+    current = profile_app(os.getcwd(), args.sessions, args.port)
+    if args.compare:
+        with tempfile.TemporaryDirectory() as workdir:
+            baseline = profile_app(export_commit(args.compare, workdir), args.sessions, args.port)
+        print_profile(args.compare, baseline)
+        print()
+    print_profile("working tree", current)
+    if args.compare:
+        print()
+        for name in INTERACTIONS:
+            before, after = baseline[name], current[name]
+            print(f"{name}: {before['seconds'] * 1000:.0f} → {after['seconds'] * 1000:.0f} ms, "
+                  f"{before['bytes'] / 1024:.1f} → {after['bytes'] / 1024:.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# === Shared Reference Snapshot ===
+# Usage: python shared_reference.py [--shared-dir reference_shared]
+#
+# Each reference snapshot (reference table plus similarity index) is published once
+# per data version as a joblib file. On load its NumPy arrays (numeric columns,
+# category codes, scaled matrices, KD-trees) are memory-mapped read-only, so every
+# dashboard process on the host maps the same pages from the OS page cache instead
+# of holding its own copy, and sessions of one process share the single snapshot
+# object held by st.cache_resource.
+import argparse  # Command line interface
+import hashlib  # File names per version
+import os  # Snapshot files
+import time  # Publishing timing
+
+SHARED_REFERENCE_DIR = "reference_shared"
+
+# Layout of the pickled snapshot (ReferenceSnapshot, SimilarityIndex and what they hold).
+# Part of every file name: bump it whenever that layout changes, so files published by
+# older code are not loaded.
+SNAPSHOT_FORMAT = 2
+
+
+# Snapshot file of a data version (base file fingerprint and applied update files)
+def snapshot_path(version, shared_dir=SHARED_REFERENCE_DIR):
+    digest = hashlib.sha256(repr((SNAPSHOT_FORMAT, version)).encode()).hexdigest()[:16]
+    return os.path.join(shared_dir, f"{digest}.joblib")
+
+
+# Memory-mapped snapshot of a version, or None when no process has published it yet
+def load_shared_snapshot(version, shared_dir=SHARED_REFERENCE_DIR):
+    import joblib  # Memory-mapped arrays
+
+    path = snapshot_path(version, shared_dir)
+    if not os.path.exists(path):
+        return None
+    return joblib.load(path, mmap_mode="r")
+
+
+# Remove snapshot files older than the given one, except the newest of them: processes
+# still on the previous version can keep mapping it, and files published after this
+# one (a newer version started by another process) are left alone.
+def remove_old_snapshots(path, keep_previous=1):
+    shared_dir = os.path.dirname(path)
+    published = os.path.getmtime(path)
+    older = []
+    for name in os.listdir(shared_dir):
+        other = os.path.join(shared_dir, name)
+        if name.endswith(".joblib") and other != path:
+            try:
+                mtime = os.path.getmtime(other)
+            except FileNotFoundError:  # removed by another process
+                continue
+            if mtime <= published:
+                older.append((mtime, other))
+    for _, other in sorted(older, reverse=True)[keep_previous:]:
+        try:
+            os.remove(other)
+        except FileNotFoundError:
+            pass
+
+
+# Publish a snapshot for the other processes and return its memory-mapped copy.
+# Written under a per-process temporary name and renamed atomically; the current and
+# the previous version are kept, older ones removed (processes still mapping them keep
+# their pages).
+def share_snapshot(snapshot, shared_dir=SHARED_REFERENCE_DIR):
+    import joblib  # Array files
+
+    path = snapshot_path(snapshot.version, shared_dir)
+    if not os.path.exists(path):
+        os.makedirs(shared_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        joblib.dump(snapshot, tmp_path)
+        os.replace(tmp_path, path)
+        remove_old_snapshots(path)
+    return load_shared_snapshot(snapshot.version, shared_dir)
+
+
+def main(argv=None):
+    from reference_refresh import REFERENCE_UPDATES_DIR, ReferenceState  # Current snapshot
+
+    parser = argparse.ArgumentParser(description="Publish the current reference snapshot for the dashboard processes.")
+    parser.add_argument("--updates-dir", default=REFERENCE_UPDATES_DIR)
+    parser.add_argument("--shared-dir", default=SHARED_REFERENCE_DIR)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    state = ReferenceState(updates_dir=args.updates_dir, shared_dir=args.shared_dir)
+    path = snapshot_path(state.snapshot.version, args.shared_dir)
+    print(f"Shared snapshot {path}: {len(state.snapshot.reference_df)} rows, "
+          f"{os.path.getsize(path) // 1024} KB in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
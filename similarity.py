@@ -0,0 +1,293 @@
+# === Similar Transfer Search ===
+# scikit-learn and SciPy are imported when an index is first built, not with this module.
+import copy  # Copy-on-write index updates
+import numpy as np  # Array math for distances
+import pandas as pd  # Data handling
+
+# Features compared between the input transfer and historical transfers
+SIMILARITY_FEATURES = [
+    "mainPosition",
+    "positionGroup",
+    "transferAge",
+    "marketvalue_closest",
+    "toTeam_marketValue",
+    "fromTeam_marketValue",
+    "percentage_played_before",
+    "scorer_before_grouped_category",
+    "clean_sheets_before",
+    "from_competition_competition_area",
+    "to_competition_competition_area",
+    "from_competition_competition_level",
+    "to_competition_competition_level",
+    "team_market_value_relation",
+]
+
+# Columns identifying a historical transfer
+ID_COLUMNS = ["playerId", "playerName", "mainPosition", "percentage_played", "season"]
+
+# Similar transfers must share position and competition levels
+PARTITION_COLUMNS = ["mainPosition", "from_competition_competition_level", "to_competition_competition_level"]
+
+# Columns shown for each similar transfer
+RESULT_COLUMNS = ["playerName", "mainPosition", "season", "percentage_played", "distance"]
+
+# Columns of the tidy batch result, one row per (query, rank)
+BATCH_RESULT_COLUMNS = ["query_id", "rank", "playerName", "season", "percentage_played", "distance"]
+
+# Largest (queries × partition rows) distance block computed at once
+MAX_BLOCK_ELEMENTS = 2 ** 22
+
+
+# Float value of a numeric query feature, or None when the feature is left out (text or NaN)
+def _numeric_value(value):
+    if isinstance(value, str) or value is None or pd.isna(value):
+        return None
+    return float(value)
+
+
+# Brute-force search: rescans and rescales the reference table on every call
+def find_similar_players(input_data, df, top_n=3):
+    from sklearn.preprocessing import StandardScaler  # Scaling for similarity
+    from scipy.spatial.distance import cdist  # Distance for player similarity
+
+    input_data = dict(input_data)
+    features = list(input_data.keys())
+
+    # dont use duplicates
+    all_cols = list(dict.fromkeys(features + ID_COLUMNS))
+
+    df_subset = df[all_cols].dropna().copy()
+    df_subset.reset_index(drop=True, inplace=True)
+
+    # text columns may be object or dictionary-encoded (category) when loaded from Parquet
+    for col in df_subset.select_dtypes(include=["object", "category"]).columns:
+        df_subset[col] = df_subset[col].astype(str)
+        if col in input_data:
+            input_data[col] = str(input_data[col])
+
+    # similar transfer should be same competition level
+    df_subset = df_subset[
+        (df_subset["mainPosition"] == input_data["mainPosition"]) &
+        (df_subset["from_competition_competition_level"] == input_data["from_competition_competition_level"]) &
+        (df_subset["to_competition_competition_level"] == input_data["to_competition_competition_level"])
+    ].copy()
+
+    df_subset = df_subset.sort_values("season", ascending=False, kind="stable").drop_duplicates("playerId", keep="first").reset_index(drop=True)
+
+    df_encoded = pd.get_dummies(df_subset[features])
+    input_encoded = pd.get_dummies(pd.DataFrame([input_data]))
+    df_encoded, input_encoded = df_encoded.align(input_encoded, join="inner", axis=1)
+
+    scaler = StandardScaler()
+    df_scaled = scaler.fit_transform(df_encoded)
+    input_scaled = scaler.transform(input_encoded)
+
+    df_subset["distance"] = cdist(df_scaled, input_scaled).flatten()
+    return df_subset.nsmallest(top_n, "distance")[RESULT_COLUMNS]
+
+
+# Precomputed search structures for one (mainPosition, from level, to level) partition.
+#
+# After scaling, a one-hot column only survives the brute-force alignment when it
+# matches the query's category, so each categorical feature adds a fixed penalty
+# of 1 / scale² for rows with a different category. Numeric features go into a
+# KD-tree; candidates are pulled from the tree until no unseen row can beat them.
+class _Partition:
+    def __init__(self, rows, numeric, categorical, leaf_size):
+        from sklearn.neighbors import KDTree  # Nearest-neighbour index
+        from sklearn.preprocessing import StandardScaler  # Scaling for similarity
+
+        # rows before deduplication, kept so appended rows rebuild the partition exactly
+        self.source = rows
+        self.leaf_size = leaf_size
+        # same ordering and deduplication as the brute-force path
+        self.rows = rows.sort_values("season", ascending=False, kind="stable").drop_duplicates("playerId", keep="first").reset_index(drop=True)
+        self.numeric = numeric
+        self.categorical = categorical
+
+        self.scaler = StandardScaler().fit(self.rows[numeric].to_numpy(dtype=float)) if numeric else None
+        self.scaled = self.scaler.transform(self.rows[numeric].to_numpy(dtype=float)) if numeric else np.empty((len(self.rows), 0))
+        self.tree = KDTree(self.scaled, leaf_size=leaf_size) if numeric else None
+
+        # one-hot statistics: category codes per row and mismatch penalty per category
+        self.codes = {}
+        self.penalties = {}
+        for col in categorical:
+            dummies = pd.get_dummies(self.rows[col].cat.remove_unused_categories())
+            scale = StandardScaler().fit(dummies.to_numpy(dtype=float)).scale_
+            values = list(dummies.columns)
+            self.codes[col] = pd.Categorical(self.rows[col], categories=values).codes
+            self.penalties[col] = {value: (i, 1.0 / scale[i] ** 2) for i, value in enumerate(values)}
+
+    def __len__(self):
+        return len(self.rows)
+
+    # New partition with the given rows added
+    def extend(self, rows):
+        combined = pd.concat([self.source, rows], ignore_index=True)
+        text = combined.select_dtypes(include="object").columns
+        return _Partition(combined.astype({col: "category" for col in text}), self.numeric, self.categorical, self.leaf_size)
+
+    # Categorical penalty for the given row positions
+    def _penalty(self, query, positions):
+        penalty = np.zeros(len(positions))
+        for col in self.categorical:
+            match = self.penalties[col].get(query.get(col))
+            if match is not None:
+                code, weight = match
+                penalty += np.where(self.codes[col][positions] != code, weight, 0.0)
+        return penalty
+
+    # Row positions and distances of the top_n rows for each query of a block. A NaN
+    # numeric value leaves that feature out, like a query that omits it; ties go to
+    # the earlier row as in query().
+    def query_block(self, queries, top_n):
+        n = len(self.rows)
+        sq = np.zeros((len(queries), n))
+        if self.numeric:
+            points = self.scaler.transform(queries[self.numeric].to_numpy(dtype=float))
+            for j in range(len(self.numeric)):
+                diff = self.scaled[:, j] - points[:, j, None]
+                sq += np.where(np.isnan(diff), 0.0, diff ** 2)
+        for col in self.categorical:
+            matches = [self.penalties[col].get(value, (-1, 0.0)) for value in queries[col]]
+            codes, weights = np.array(matches).T
+            sq += np.where(self.codes[col] != codes[:, None], weights[:, None], 0.0)
+        distance = np.sqrt(sq)
+        positions = np.argsort(distance, axis=1, kind="stable")[:, :top_n]
+        return positions, np.take_along_axis(distance, positions, axis=1)
+
+    def query(self, query, numeric_used, top_n):
+        n = len(self.rows)
+        if n == 0:
+            return pd.DataFrame(columns=RESULT_COLUMNS)
+
+        if numeric_used == self.numeric and self.tree is not None:
+            point = self.scaler.transform(np.array([[query[col] for col in self.numeric]], dtype=float))
+            k = min(max(top_n, 1), n)
+            while True:
+                numeric_dist, positions = self.tree.query(point, k=k)
+                numeric_dist, positions = numeric_dist[0], positions[0]
+                distance = np.sqrt(numeric_dist ** 2 + self._penalty(query, positions))
+                order = np.lexsort((positions, distance))[:top_n]
+                # unseen rows are at least as far as the last numeric neighbour
+                if k == n or distance[order[-1]] < numeric_dist[-1]:
+                    break
+                k = min(n, k * 4)
+            positions, distance = positions[order], distance[order]
+        else:
+            # query omits some numeric features: scan the stored scaled matrix
+            positions = np.arange(n)
+            cols = [self.numeric.index(col) for col in numeric_used]
+            numeric_sq = np.zeros(n)
+            if cols:
+                point = self.scaler.transform(np.array([[query[col] if col in numeric_used else 0.0 for col in self.numeric]], dtype=float))
+                numeric_sq = ((self.scaled[:, cols] - point[0, cols]) ** 2).sum(axis=1)
+            distance = np.sqrt(numeric_sq + self._penalty(query, positions))
+            order = np.lexsort((positions, distance))[:top_n]
+            positions, distance = positions[order], distance[order]
+
+        result = self.rows.iloc[positions][RESULT_COLUMNS[:-1]]
+        # text columns back to plain str, whatever categories this partition was built with
+        result = result.astype({col: object for col in result.select_dtypes("category").columns})
+        result["distance"] = distance
+        return result
+
+
+# Similarity index built once from the reference dataset.
+# Answers the same top-k queries as find_similar_players without rescanning the table.
+class SimilarityIndex:
+    def __init__(self, df, features=SIMILARITY_FEATURES, leaf_size=40):
+        self.features = list(features)
+        self.leaf_size = leaf_size
+        df_subset = df[list(dict.fromkeys(self.features + ID_COLUMNS))].dropna()
+
+        self.object_columns = set(df_subset.select_dtypes(include=["object", "category"]).columns)
+        df_subset = self._prepare(df_subset)
+
+        # get_dummies encodes every non-numeric column, everything else is scaled as is
+        self.categorical = [f for f in self.features if not pd.api.types.is_numeric_dtype(df_subset[f])]
+        self.numeric = [f for f in self.features if f not in self.categorical]
+
+        self.partitions = {
+            key: _Partition(rows, self.numeric, self.categorical, leaf_size)
+            for key, rows in df_subset.groupby(PARTITION_COLUMNS, sort=False, observed=True)
+        }
+
+    # Reference rows with a fresh index and text columns as categories of their str values.
+    # Integer category codes, unlike Python strings, can be memory-mapped from a shared snapshot.
+    def _prepare(self, df_subset):
+        df_subset = df_subset.reset_index(drop=True)
+        for col in self.object_columns:
+            df_subset[col] = df_subset[col].astype(str).astype("category")
+        return df_subset
+
+    # New index with the given reference rows appended; only the partitions they touch are rebuilt
+    def append(self, df):
+        df_subset = df[list(dict.fromkeys(self.features + ID_COLUMNS))].dropna()
+        df_subset = self._prepare(df_subset)
+        for col in self.numeric:
+            df_subset[col] = pd.to_numeric(df_subset[col])
+
+        index = copy.copy(self)
+        index.partitions = dict(self.partitions)
+        for key, rows in df_subset.groupby(PARTITION_COLUMNS, sort=False, observed=True):
+            partition = index.partitions.get(key)
+            index.partitions[key] = (partition.extend(rows) if partition is not None
+                                     else _Partition(rows.reset_index(drop=True), self.numeric, self.categorical, self.leaf_size))
+        return index
+
+    def query(self, input_data, top_n=3):
+        query = dict(input_data)
+        for col in self.object_columns:
+            if col in query:
+                query[col] = str(query[col])
+
+        key = tuple(query[col] for col in PARTITION_COLUMNS)
+        partition = self.partitions.get(key)
+        if partition is None:
+            return pd.DataFrame(columns=RESULT_COLUMNS)
+
+        numeric_used = [col for col in self.numeric if col in query and _numeric_value(query[col]) is not None]
+        return partition.query(query, numeric_used, top_n)
+
+    # Top-k similar transfers for every row of a query frame, as a tidy frame with one row
+    # per (query_id, rank). Queries are grouped by partition and distances are computed
+    # in blocks of at most MAX_BLOCK_ELEMENTS; query_id is the index of the query frame.
+    # Columns and values are used as in query(): a missing column, text or NaN in a
+    # numeric column leaves that feature out of the query's distance.
+    def query_batch(self, queries, top_n=3, max_block_elements=MAX_BLOCK_ELEMENTS):
+        queries = queries.reindex(columns=self.features)
+        for col in self.numeric:
+            if not pd.api.types.is_numeric_dtype(queries[col]):
+                queries[col] = np.array([_numeric_value(value) for value in queries[col]], dtype=float)
+        for col in self.object_columns & set(self.features):
+            queries[col] = queries[col].astype(str)
+        query_ids = queries.index.to_numpy()
+        queries = queries.reset_index(drop=True)
+
+        results = []
+        for key, group in queries.groupby(PARTITION_COLUMNS, sort=False, observed=True):
+            partition = self.partitions.get(key)
+            if partition is None or len(partition) == 0:
+                continue
+            k = min(top_n, len(partition))
+            block = max(1, max_block_elements // len(partition))
+            for start in range(0, len(group), block):
+                chunk = group.iloc[start:start + block]
+                positions, distance = partition.query_block(chunk, k)
+                rows = partition.rows.iloc[positions.ravel()]
+                results.append(pd.DataFrame({
+                    "query_position": np.repeat(chunk.index.to_numpy(), k),
+                    "rank": np.tile(np.arange(1, k + 1), len(chunk)),
+                    "playerName": rows["playerName"].to_numpy(),
+                    "season": rows["season"].to_numpy(),
+                    "percentage_played": rows["percentage_played"].to_numpy(),
+                    "distance": distance.ravel(),
+                }))
+
+        if not results:
+            return pd.DataFrame(columns=BATCH_RESULT_COLUMNS)
+        result = pd.concat(results, ignore_index=True).sort_values(["query_position", "rank"], kind="stable")
+        result.insert(0, "query_id", query_ids[result.pop("query_position").to_numpy()])
+        return result.reset_index(drop=True)
@@ -0,0 +1,100 @@
+# === Speculative Prediction ===
+#
+# While a user edits the inputs, the prediction for the current inputs is computed in a
+# background thread pool and stored in the prediction cache, so the Predict click usually
+# only has to display it. A computation starts once the inputs have been left alone for a
+# short settle delay. When they change again, a computation that has not started is
+# cancelled, and a running one stops at its next stage boundary and its result is dropped.
+import threading  # Settle timers, cancellation flags
+from concurrent.futures import ThreadPoolExecutor  # Background workers
+
+DEFAULT_WORKERS = 2
+DEFAULT_SETTLE_DELAY = 0.3
+DEFAULT_WAIT_TIMEOUT = 5.0
+
+
+# Raised at a stage boundary of a cancelled computation
+class SpeculationCancelled(Exception):
+    pass
+
+
+# One speculative computation for one cache key
+class Speculation:
+    def __init__(self, key):
+        self.key = key
+        self.cancelled = threading.Event()
+        self.done = threading.Event()
+
+    # Called by the computation between its stages
+    def checkpoint(self):
+        if self.cancelled.is_set():
+            raise SpeculationCancelled()
+
+    # Takes effect when the settle delay ends, when a queued computation starts or at the next checkpoint
+    def cancel(self):
+        self.cancelled.set()
+
+
+# Background pool shared by all sessions; results go into the shared prediction cache
+class SpeculativePredictor:
+    def __init__(self, cache, workers=DEFAULT_WORKERS, settle_delay=DEFAULT_SETTLE_DELAY):
+        self.cache = cache
+        self.settle_delay = settle_delay
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="speculative")
+        self.lock = threading.Lock()
+        self.running = {}
+        self.counts = {"submitted": 0, "completed": 0, "cached": 0, "cancelled": 0, "failed": 0}
+
+    # Schedule compute(checkpoint) for a cache key once the settle delay has passed
+    def submit(self, key, compute):
+        speculation = Speculation(key)
+        with self.lock:
+            self.counts["submitted"] += 1
+        timer = threading.Timer(self.settle_delay, self._start, args=(speculation, compute))
+        timer.daemon = True
+        timer.start()
+        return speculation
+
+    def _start(self, speculation, compute):
+        if speculation.cancelled.is_set():
+            self._finish(speculation, "cancelled")
+            return
+        if speculation.key in self.cache:
+            self._finish(speculation, "cached")
+            return
+        with self.lock:
+            self.running[speculation.key] = speculation
+        self.pool.submit(self._run, speculation, compute)
+
+    def _run(self, speculation, compute):
+        outcome = "completed"
+        try:
+            speculation.checkpoint()
+            value = compute(speculation.checkpoint)
+            speculation.checkpoint()
+            self.cache.put(speculation.key, value)
+        except SpeculationCancelled:
+            outcome = "cancelled"
+        except Exception:  # Predict computes the result itself
+            outcome = "failed"
+        finally:
+            self._finish(speculation, outcome)
+
+    def _finish(self, speculation, outcome):
+        with self.lock:
+            self.counts[outcome] += 1
+            if self.running.get(speculation.key) is speculation:
+                del self.running[speculation.key]
+        speculation.done.set()
+
+    # Wait for a running computation of this key, so Predict does not start the same work again.
+    # After the timeout Predict goes on and computes the result itself.
+    def wait(self, key, timeout=DEFAULT_WAIT_TIMEOUT):
+        with self.lock:
+            speculation = self.running.get(key)
+        if speculation is not None:
+            speculation.done.wait(timeout)
+
+    def stats(self):
+        with self.lock:
+            return {**self.counts, "running": len(self.running)}
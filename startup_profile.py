@@ -0,0 +1,113 @@
+# === Startup Profile of the Dashboard ===
+# Usage: python startup_profile.py [--compare <git ref>] [--top 15]
+#
+# Renders app_final.py once in a fresh interpreter started with -X importtime and
+# reports the time to first render, the import time spent inside the app script
+# and the most expensive top-level packages. With --compare, the same run is done
+# for an earlier commit (exported with git archive) to show before and after.
+import argparse  # Command line interface
+import os  # Paths
+import re  # importtime lines
+import shutil  # Data files for the exported commit
+import subprocess  # Profiled interpreter, git
+import sys  # Interpreter path
+import tempfile  # Exported commit
+from collections import defaultdict  # Per-package totals
+from pipeline import MODEL_PATH, GAM_MODEL_PATH, REFERENCE_PATH  # Files the app needs
+from reference_store import REFERENCE_PARQUET_PATH  # Columnar reference data
+
+APP_PATH = "app_final.py"
+RENDER_MARKER = "=== first render ==="
+
+# Runs inside the profiled interpreter: streamlit is imported first, since every
+# server has it loaded before the first session, then the app renders once
+_RENDER_SCRIPT = f"""
+import sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+ready = time.perf_counter()
+print({RENDER_MARKER!r}, file=sys.stderr, flush=True)
+at = AppTest.from_file(sys.argv[1], default_timeout=600)
+at.run()
+done = time.perf_counter()
+if at.exception:
+    raise SystemExit(f"app raised: {{at.exception}}")
+print(f"{{ready - start}} {{done - ready}}")
+"""
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+# Self and cumulative import times (µs) of the modules imported after the marker
+def parse_importtime(stderr):
+    lines = stderr.split(RENDER_MARKER, 1)[-1].splitlines()
+    modules = []
+    for line in lines:
+        match = _IMPORTTIME.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return modules
+
+
+# Render the app in app_dir once; returns the timings and per-package import totals
+def profile_app(app_dir):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _RENDER_SCRIPT, os.path.join(app_dir, APP_PATH)],
+        cwd=app_dir, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    streamlit_s, render_s = (float(v) for v in result.stdout.split()[-2:])
+    modules = parse_importtime(result.stderr)
+
+    packages = defaultdict(int)
+    for name, self_us, _, _ in modules:
+        packages[name.split(".")[0]] += self_us
+    return {
+        "streamlit_import_s": streamlit_s,
+        "first_render_s": render_s,
+        "app_import_s": sum(self_us for _, self_us, _, _ in modules) / 1e6,
+        "packages": dict(sorted(packages.items(), key=lambda item: -item[1])),
+    }
+
+
+# Export a commit with git archive and add the untracked model and data files of this checkout
+def export_commit(ref, workdir):
+    target = os.path.join(workdir, ref.replace("/", "_"))
+    os.makedirs(target)
+    archive = subprocess.run(["git", "archive", ref], capture_output=True, check=True).stdout
+    subprocess.run(["tar", "-x", "-C", target], input=archive, check=True)
+    for path in (MODEL_PATH, GAM_MODEL_PATH, REFERENCE_PATH, REFERENCE_PARQUET_PATH):
+        if os.path.exists(path) and not os.path.exists(os.path.join(target, path)):
+            shutil.copy(path, os.path.join(target, path))
+    return target
+
+
+def print_profile(label, profile, top):
+    print(f"{label}: first render {profile['first_render_s']:.2f}s "
+          f"(imports inside the app {profile['app_import_s']:.2f}s; streamlit itself {profile['streamlit_import_s']:.2f}s)")
+    for name, us in list(profile["packages"].items())[:top]:
+        print(f"    {name:<24} {us / 1000:>8.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile the dashboard's cold start.")
+    parser.add_argument("--compare", help="git ref to profile as the baseline, e.g. HEAD~1")
+    parser.add_argument("--top", type=int, default=15, help="packages listed per run")
+    args = parser.parse_args(argv)
+
+    current = profile_app(os.getcwd())
+    if args.compare:
+        with tempfile.TemporaryDirectory() as workdir:
+            baseline = profile_app(export_commit(args.compare, workdir))
+        print_profile(f"{args.compare}", baseline, args.top)
+        print()
+    print_profile("working tree", current, args.top)
+    if args.compare:
+        print(f"\nfirst render: {baseline['first_render_s']:.2f}s → {current['first_render_s']:.2f}s, "
+              f"app imports: {baseline['app_import_s']:.2f}s → {current['app_import_s']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# === What-if Sensitivity Sweep ===
+import numpy as np  # Grid construction
+import pandas as pd  # Data handling
+from pipeline import predict_playing_time  # Prediction chain
+
+# Inputs that can be swept: column → (label, low, high, unit scale of the model column)
+SWEEP_INPUTS = {
+    "transferAge": ("Transfer Age", 16, 40, 1),
+    "marketvalue_closest": ("Player Market Value (€M)", 0.0, 200.0, 1),
+    "toTeam_marketValue": ("To Team Market Value (€M)", 0.0, 1400.0, 1_000_000),
+    "fromTeam_marketValue": ("From Team Market Value (€M)", 0.0, 1400.0, 1_000_000),
+    "percentage_played_before": ("Playing % Before", 0.0, 100.0, 1),
+    "height": ("Height (cm)", 150, 220, 1),
+}
+
+
+# Evenly spaced display values for one sweep input
+def sweep_values(col, points):
+    _, low, high, _ = SWEEP_INPUTS[col]
+    return np.linspace(low, high, points)
+
+
+# All combinations of the swept values, other inputs fixed to the base transfer
+def build_grid(base, x_col, x_values, y_col=None, y_values=None):
+    if y_col is None:
+        xs, ys = np.asarray(x_values), None
+    else:
+        xs, ys = (axis.ravel() for axis in np.meshgrid(x_values, y_values))
+
+    grid = pd.DataFrame({col: [value] * len(xs) for col, value in base.items()})
+    grid[x_col] = xs * SWEEP_INPUTS[x_col][3]
+    if y_col is not None:
+        grid[y_col] = ys * SWEEP_INPUTS[y_col][3]
+    return grid
+
+
+# Score the whole grid with one XGBoost call and one GAM call.
+# Returns the predictions shaped (len(y_values), len(x_values)), or (len(x_values),) for one input.
+def run_sweep(model, gam_model, builder, base, x_col, x_values, y_col=None, y_values=None):
+    grid = build_grid(base, x_col, x_values, y_col, y_values)
+    _, final_pred = predict_playing_time(model, gam_model, builder.build(grid))
+    if y_col is None:
+        return final_pred
+    return final_pred.reshape(len(y_values), len(x_values))
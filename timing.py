@@ -0,0 +1,150 @@
+# === Stage Latency Instrumentation ===
+#
+# Named stages are timed with `with stage("name"):`. Each stage keeps a rolling
+# window of samples for percentiles plus cumulative totals, and the stages of the
+# current rerun (or request) are collected in a per-thread run record.
+import contextvars  # Per-session run records
+import json  # Structured logs
+import logging  # Log output
+import threading  # Shared registry, metrics server
+import time  # Timing
+from collections import defaultdict, deque  # Rolling windows
+from contextlib import contextmanager  # Stage context manager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # Metrics endpoint
+import numpy as np  # Percentiles
+
+DEFAULT_WINDOW = 1000
+QUANTILES = (0.5, 0.95, 0.99)
+
+logger = logging.getLogger("dashboard.timing")
+_current_run = contextvars.ContextVar("current_run", default=None)
+
+
+# Rolling samples and cumulative totals for every stage
+class StageRegistry:
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self.samples = defaultdict(lambda: deque(maxlen=self.window))
+        self.totals = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self.lock:
+            self.samples[name].append(seconds)
+            self.totals[name] += seconds
+            self.counts[name] += 1
+
+    # Count, cumulative total and rolling percentiles (in seconds) per stage
+    def summary(self):
+        with self.lock:
+            snapshot = {name: (np.array(values), self.totals[name], self.counts[name]) for name, values in self.samples.items()}
+        return {
+            name: {
+                "count": count,
+                "sum_s": total,
+                **{f"p{int(q * 100)}_s": float(np.quantile(values, q)) for q in QUANTILES},
+            }
+            for name, (values, total, count) in snapshot.items()
+        }
+
+    # Prometheus text exposition of the stage latencies
+    def prometheus_text(self, metric="dashboard_stage_seconds"):
+        lines = [f"# HELP {metric} Latency of named dashboard stages.", f"# TYPE {metric} summary"]
+        for name, s in sorted(self.summary().items()):
+            for q in QUANTILES:
+                lines.append(f'{metric}{{stage="{name}",quantile="{q}"}} {s[f"p{int(q * 100)}_s"]:.6f}')
+            lines.append(f'{metric}_sum{{stage="{name}"}} {s["sum_s"]:.6f}')
+            lines.append(f'{metric}_count{{stage="{name}"}} {s["count"]}')
+        return "\n".join(lines) + "\n"
+
+
+registry = StageRegistry()
+
+
+# Start collecting the stages of one rerun or request
+def begin_run():
+    run = {}
+    _current_run.set(run)
+    return run
+
+
+# Stage timings of the current run
+def current_run():
+    return _current_run.get() or {}
+
+
+# Log the stages of a run as one structured JSON line
+def log_run(event, run):
+    logger.info(json.dumps({"event": event, "stages_ms": {name: round(s * 1000, 3) for name, s in run.items()}}))
+
+
+def _record(name, elapsed):
+    registry.record(name, elapsed)
+    run = _current_run.get()
+    if run is not None:
+        run[name] = run.get(name, 0.0) + elapsed
+
+
+# Time a named stage
+@contextmanager
+def stage(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, time.perf_counter() - start)
+
+
+# Times consecutive sections of a script: each lap records the time since the previous lap
+class LapTimer:
+    def __init__(self):
+        self.start = self.last = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        _record(name, now - self.last)
+        self.last = now
+
+    def total(self, name):
+        _record(name, time.perf_counter() - self.start)
+
+
+# Send the structured run logs to stderr
+def enable_timing_log(level=logging.INFO):
+    if not logger.handlers:
+        logger.addHandler(logging.StreamHandler())
+    logger.setLevel(level)
+
+
+# HTTP handler for GET /metrics; servers with more endpoints subclass it and call send_metrics
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        self.send_metrics()
+
+    def send_metrics(self):
+        body = registry.prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Serve GET /metrics in a background thread. When the port is taken (e.g. by a second
+# dashboard process) a warning is logged and None returned; the app keeps running.
+def start_metrics_server(port, host="127.0.0.1"):
+    try:
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+    except OSError as exc:
+        logger.warning("metrics endpoint not started on %s:%s: %s", host, port, exc)
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,180 @@
+# === Compiled Tree Inference ===
+#
+# Flattens the trees of the XGBoost booster into NumPy arrays and evaluates all
+# trees for all rows level by level. This skips the DMatrix construction that
+# dominates model.predict for a single row. Categorical features are read as the
+# category codes of the feature frame, which FeatureBuilder builds from category_mappings.
+import json  # Booster dump
+import numpy as np  # Array evaluation
+import pandas as pd  # Feature frames
+
+# Objectives whose prediction is the raw margin, or a link function of it
+_IDENTITY_OBJECTIVES = {"reg:squarederror", "reg:squaredlogerror", "reg:pseudohubererror", "reg:absoluteerror", "reg:quantileerror"}
+_LOGISTIC_OBJECTIVES = {"reg:logistic", "binary:logistic"}
+_EXP_OBJECTIVES = {"count:poisson", "reg:gamma", "reg:tweedie"}
+
+# Largest accepted difference to model.predict, in percentage points of playing time
+DEFAULT_TOLERANCE = 1e-3
+
+
+# Trees of an XGBoost booster as flat arrays
+class CompiledTrees:
+    def __init__(self, booster):
+        learner = json.loads(booster.save_raw("json"))["learner"]
+        params = learner["learner_model_param"]
+        booster_dump = learner["gradient_booster"]
+        if booster_dump["name"] != "gbtree":
+            raise ValueError(f"unsupported booster: {booster_dump['name']}")
+        if int(params.get("num_target", 1)) != 1 or int(params.get("num_class", 0)) > 1:
+            raise ValueError("only single-output models are supported")
+
+        self.objective = learner["objective"]["name"]
+        if self.objective not in _IDENTITY_OBJECTIVES | _LOGISTIC_OBJECTIVES | _EXP_OBJECTIVES:
+            raise ValueError(f"unsupported objective: {self.objective}")
+        self.feature_names = list(learner["feature_names"])
+        self.feature_names_in_ = np.array(self.feature_names, dtype=object)
+
+        trees = booster_dump["model"]["trees"]
+        best_iteration = booster.attributes().get("best_iteration")
+        if best_iteration is not None:
+            num_parallel = int(booster_dump["model"]["gbtree_model_param"]["num_parallel_tree"])
+            trees = trees[:(int(best_iteration) + 1) * num_parallel]
+        self._compile(trees)
+
+        base_score = float(params["base_score"].strip("[]"))
+        if self.objective in _LOGISTIC_OBJECTIVES:
+            self.base_margin = float(np.log(base_score / (1 - base_score)))
+        elif self.objective in _EXP_OBJECTIVES:
+            self.base_margin = float(np.log(base_score))
+        else:
+            self.base_margin = base_score
+
+    def _compile(self, trees):
+        left, right, feature, threshold, default_left, value, is_cat, cat_slot = ([] for _ in range(8))
+        cat_sets = []
+        roots = []
+        offset = 0
+        for tree in trees:
+            n = len(tree["left_children"])
+            roots.append(offset)
+            tree_left = np.array(tree["left_children"])
+            tree_right = np.array(tree["right_children"])
+            left.append(np.where(tree_left >= 0, tree_left + offset, -1))
+            right.append(np.where(tree_right >= 0, tree_right + offset, -1))
+            feature.append(tree["split_indices"])
+            threshold.append(tree["split_conditions"])
+            default_left.append(tree["default_left"])
+            value.append(tree["split_conditions"])
+
+            tree_is_cat = np.array(tree.get("split_type", [0] * n)) == 1
+            tree_slot = np.full(n, -1)
+            for node, start, size in zip(tree.get("categories_nodes", []), tree.get("categories_segments", []), tree.get("categories_sizes", [])):
+                tree_slot[node] = len(cat_sets)
+                cat_sets.append(tree["categories"][start:start + size])
+            is_cat.append(tree_is_cat)
+            cat_slot.append(tree_slot)
+            offset += n
+
+        self.left = np.concatenate(left)
+        self.right = np.concatenate(right)
+        self.is_leaf = self.left == -1
+        self.feature = np.concatenate(feature).astype(np.intp)
+        self.threshold = np.concatenate(threshold).astype(np.float32)
+        self.default_left = np.concatenate(default_left).astype(bool)
+        self.value = np.concatenate(value).astype(np.float32)
+        self.is_cat = np.concatenate(is_cat)
+        self.cat_slot = np.concatenate(cat_slot)
+        self.roots = np.array(roots, dtype=np.intp)
+
+        # categories sent to the right child, as a dense (categorical node, category) table
+        max_cat = max((max(c) for c in cat_sets if c), default=-1) + 1
+        self.cat_right = np.zeros((max(len(cat_sets), 1), max(max_cat, 1)), dtype=bool)
+        for slot, cats in enumerate(cat_sets):
+            self.cat_right[slot, cats] = True
+        self.max_depth = self._max_depth()
+
+    def _max_depth(self):
+        depth = 0
+        nodes = self.roots
+        while not self.is_leaf[nodes].all():
+            nodes = np.concatenate([nodes[self.is_leaf[nodes]], self.left[nodes[~self.is_leaf[nodes]]], self.right[nodes[~self.is_leaf[nodes]]]])
+            depth += 1
+        return depth
+
+    # Float32 matrix in model column order; categorical columns as codes, missing as NaN
+    def to_matrix(self, features):
+        if list(features.columns) != self.feature_names:
+            features = features[self.feature_names]
+        X = np.empty((len(features), len(self.feature_names)), dtype=np.float32)
+        for i, (_, series) in enumerate(features.items()):
+            values = series.array
+            if isinstance(values, pd.Categorical):
+                X[:, i] = np.where(values.codes < 0, np.nan, values.codes)
+            else:
+                X[:, i] = values.to_numpy(dtype=np.float32, na_value=np.nan)
+        return X
+
+    # Raw margin for a float32 feature matrix
+    def predict_margin(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[node]]
+            missing = np.isnan(x)
+            go_left = np.where(missing, self.default_left[node], x < self.threshold[node])
+
+            cat_nodes = self.is_cat[node] & ~missing
+            if cat_nodes.any():
+                codes = x[cat_nodes].astype(np.intp)
+                slots = self.cat_slot[node[cat_nodes]]
+                valid = (codes >= 0) & (codes < self.cat_right.shape[1])
+                in_set = np.zeros(len(codes), dtype=bool)
+                in_set[valid] = self.cat_right[slots[valid], codes[valid]]
+                go_left[cat_nodes] = ~in_set
+
+            node = np.where(self.is_leaf[node], node, np.where(go_left, self.left[node], self.right[node]))
+        return self.base_margin + self.value[node].sum(axis=1, dtype=np.float64)
+
+    # Same output as model.predict for a typed feature frame
+    def predict(self, features):
+        margin = self.predict_margin(self.to_matrix(features))
+        if self.objective in _LOGISTIC_OBJECTIVES:
+            margin = 1 / (1 + np.exp(-margin))
+        elif self.objective in _EXP_OBJECTIVES:
+            margin = np.exp(margin)
+        return margin.astype(np.float32)
+
+
+# Random feature frame probing every split threshold and category of the model
+def probe_frame(compiled, dtypes, n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for i, col in enumerate(compiled.feature_names_in_):
+        if col in dtypes:
+            dtype = dtypes[col]
+            codes = rng.integers(-1, len(dtype.categories), n)
+            columns[col] = pd.Categorical.from_codes(codes, dtype=dtype)
+        else:
+            splits = compiled.threshold[(compiled.feature == i) & ~compiled.is_leaf & ~compiled.is_cat]
+            if len(splits) == 0:
+                splits = np.array([0.0], dtype=np.float32)
+            values = rng.choice(splits, n).astype(np.float64) + rng.choice([-1e-3, 0.0, 1e-3], n) * np.maximum(np.abs(rng.choice(splits, n)), 1)
+            values[rng.random(n) < 0.05] = np.nan
+            columns[col] = values
+    return pd.DataFrame(columns)
+
+
+# Largest absolute difference to model.predict on a probe frame
+def max_deviation(compiled, model, dtypes, n=2000):
+    probe = probe_frame(compiled, dtypes, n)
+    return float(np.max(np.abs(compiled.predict(probe) - model.predict(probe))))
+
+
+# Compiled model when it agrees with model.predict within the tolerance, else None
+def compile_model(model, dtypes, tolerance=DEFAULT_TOLERANCE):
+    try:
+        compiled = CompiledTrees(model.get_booster())
+    except ValueError:
+        return None
+    return compiled if max_deviation(compiled, model, dtypes) <= tolerance else None